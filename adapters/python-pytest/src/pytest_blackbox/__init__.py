@@ -1,3 +1,4 @@
-__all__ = ["BlackBoxRecorder"]
+__all__ = ["BlackBoxRecorder", "JsonLimits", "register_json_type", "to_json_value"]
 
 from .plugin import BlackBoxRecorder
+from .serialize import JsonLimits, register_json_type, to_json_value
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import os
+import platform
+from dataclasses import dataclass, field, replace
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import pytest
+
+from .redact import Redactor
+
+# Variables copied into meta.env when no allowlist is configured. Patterns use
+# fnmatch syntax and are matched case-sensitively against variable names.
+DEFAULT_ENV_ALLOWLIST = ("CI", "TZ", "LANG", "LC_*", "PYTHONHASHSEED", "PYTEST_XDIST_WORKER")
+
+# (detection variable, provider, {meta.ci field: variable}); the first match wins,
+# the bare CI=... convention last.
+CI_PROVIDERS: Tuple[Tuple[str, str, Dict[str, str]], ...] = (
+    (
+        "GITHUB_ACTIONS",
+        "github-actions",
+        {
+            "buildId": "GITHUB_RUN_ID",
+            "job": "GITHUB_JOB",
+            "branch": "GITHUB_REF_NAME",
+            "commit": "GITHUB_SHA",
+        },
+    ),
+    (
+        "GITLAB_CI",
+        "gitlab",
+        {
+            "buildId": "CI_PIPELINE_ID",
+            "buildUrl": "CI_PIPELINE_URL",
+            "job": "CI_JOB_NAME",
+            "branch": "CI_COMMIT_REF_NAME",
+            "commit": "CI_COMMIT_SHA",
+        },
+    ),
+    (
+        "CIRCLECI",
+        "circleci",
+        {
+            "buildId": "CIRCLE_BUILD_NUM",
+            "buildUrl": "CIRCLE_BUILD_URL",
+            "job": "CIRCLE_JOB",
+            "branch": "CIRCLE_BRANCH",
+            "commit": "CIRCLE_SHA1",
+        },
+    ),
+    (
+        "BUILDKITE",
+        "buildkite",
+        {
+            "buildId": "BUILDKITE_BUILD_ID",
+            "buildUrl": "BUILDKITE_BUILD_URL",
+            "job": "BUILDKITE_LABEL",
+            "branch": "BUILDKITE_BRANCH",
+            "commit": "BUILDKITE_COMMIT",
+        },
+    ),
+    (
+        "JENKINS_URL",
+        "jenkins",
+        {
+            "buildId": "BUILD_NUMBER",
+            "buildUrl": "BUILD_URL",
+            "job": "JOB_NAME",
+            "branch": "BRANCH_NAME",
+            "commit": "GIT_COMMIT",
+        },
+    ),
+    (
+        "TF_BUILD",
+        "azure-pipelines",
+        {
+            "buildId": "BUILD_BUILDID",
+            "job": "SYSTEM_JOBDISPLAYNAME",
+            "branch": "BUILD_SOURCEBRANCHNAME",
+            "commit": "BUILD_SOURCEVERSION",
+        },
+    ),
+    (
+        "TRAVIS",
+        "travis",
+        {
+            "buildId": "TRAVIS_BUILD_ID",
+            "buildUrl": "TRAVIS_BUILD_WEB_URL",
+            "job": "TRAVIS_JOB_NAME",
+            "branch": "TRAVIS_BRANCH",
+            "commit": "TRAVIS_COMMIT",
+        },
+    ),
+    (
+        "BITBUCKET_BUILD_NUMBER",
+        "bitbucket",
+        {
+            "buildId": "BITBUCKET_BUILD_NUMBER",
+            "branch": "BITBUCKET_BRANCH",
+            "commit": "BITBUCKET_COMMIT",
+        },
+    ),
+    ("TEAMCITY_VERSION", "teamcity", {"buildId": "BUILD_NUMBER"}),
+    ("CI", "unknown", {}),
+)
+
+
+@dataclass(frozen=True)
+class Environment:
+    """Run-wide manifest metadata, probed once per session and shared by every bundle.
+
+    `redactions` holds the JSON Pointers already scrubbed from `ci` and `env`.
+    """
+
+    framework: Dict[str, Any]
+    runtime: Dict[str, Any]
+    git_sha: Optional[str] = None
+    ci: Optional[Dict[str, Any]] = None
+    env: Dict[str, str] = field(default_factory=dict)
+    redactions: Tuple[str, ...] = ()
+
+    def meta(self) -> Dict[str, Any]:
+        """The manifest `meta` members contributed by this environment."""
+        meta: Dict[str, Any] = {"framework": self.framework, "runtime": self.runtime}
+        if self.git_sha:
+            meta["gitSha"] = self.git_sha
+        if self.ci:
+            meta["ci"] = self.ci
+        if self.env:
+            meta["env"] = self.env
+        return meta
+
+    def redacted(self, redactor: Redactor) -> "Environment":
+        found: List[str] = []
+        ci = redactor.redact_value(self.ci, "/meta/ci", found) if self.ci else self.ci
+        env = redactor.redact_value(self.env, "/meta/env", found)
+        if not found:
+            return self
+        return replace(self, ci=ci, env=env, redactions=self.redactions + tuple(found))
+
+
+def probe_environment(
+    root: Optional[Path] = None,
+    allowlist: Iterable[str] = DEFAULT_ENV_ALLOWLIST,
+    environ: Optional[Mapping[str, str]] = None,
+) -> Environment:
+    """Collect runtime, git and CI metadata without spawning any process."""
+    environ = os.environ if environ is None else environ
+    ci = detect_ci(environ)
+    git_sha = read_git_sha(root if root is not None else Path.cwd())
+    if git_sha is None and ci is not None:
+        git_sha = ci.get("commit")
+    return Environment(
+        framework={"name": "pytest", "version": pytest.__version__},
+        runtime={
+            "language": "python",
+            "version": platform.python_version(),
+            "os": platform.system(),
+            "arch": platform.machine(),
+        },
+        git_sha=git_sha,
+        ci=ci,
+        env=allowed_env(environ, allowlist),
+    )
+
+
+def detect_ci(environ: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+    for marker, provider, fields in CI_PROVIDERS:
+        if not environ.get(marker):
+            continue
+        ci: Dict[str, Any] = {"provider": provider}
+        for name, var in fields.items():
+            value = environ.get(var)
+            if value:
+                ci[name] = value
+        return ci
+    return None
+
+
+def allowed_env(environ: Mapping[str, str], allowlist: Iterable[str]) -> Dict[str, str]:
+    patterns = [p for p in allowlist if p]
+    if not patterns:
+        return {}
+    return {
+        name: environ[name]
+        for name in sorted(environ)
+        if any(fnmatchcase(name, pattern) for pattern in patterns)
+    }
+
+
+def find_git_dir(start: Path) -> Optional[Path]:
+    """Return the git directory for `start`, following `.git` files of worktrees/submodules."""
+    for directory in (start, *start.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            try:
+                text = dot_git.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            if not text.startswith("gitdir:"):
+                return None
+            return (directory / text[len("gitdir:") :].strip()).resolve()
+    return None
+
+
+def read_git_sha(start: Path) -> Optional[str]:
+    """Resolve HEAD to a commit id by reading the repository files directly."""
+    git_dir = find_git_dir(start.resolve())
+    if git_dir is None:
+        return None
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not head.startswith("ref:"):
+        return head or None
+    ref = head[len("ref:") :].strip()
+    # Linked worktrees keep HEAD locally but share refs with the main repository.
+    common_dir = git_dir
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+        common_dir = (git_dir / common).resolve()
+    except OSError:
+        pass
+    for base in dict.fromkeys((git_dir, common_dir)):
+        try:
+            sha = (base / ref).read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        if sha:
+            return sha
+    return _packed_ref(common_dir / "packed-refs", ref)
+
+
+def _packed_ref(path: Path, ref: str) -> Optional[str]:
+    try:
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("#", "^")):
+                    continue
+                sha, _, name = line.rstrip("\n").partition(" ")
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+    return None
@@ -1,20 +1,57 @@
 from __future__ import annotations
 
-import hashlib
-import json
+import dataclasses
+import functools
 import os
-import platform
-import uuid
+import re
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 import pytest
 
+# redact and environment are only needed once pytest is configured or a bundle is
+# written, so they (and hashlib/shutil) are imported where used to keep plugin import cheap.
+if TYPE_CHECKING:
+    from .environment import Environment
+    from .redact import Redactor
+from .serialize import (
+    DEFAULT_LIMITS,
+    JsonEncoder,
+    JsonLimits,
+    check_backend,
+    get_encoder,
+    to_json_value,
+)
+
 LEVELS = {"DEBUG", "INFO", "WARN", "ERROR"}
+TRUTHY = {"1", "true", "yes", "on"}
 STASH_KEY = object()
-RUN_ID = str(uuid.uuid4())
+REDACTOR_KEY = object()
+ENVIRONMENT_KEY = object()
+JSON_KEY = object()
+HOOKS_PLUGIN_NAME = "blackbox-runtest"
+AUTOUSE_PLUGIN_NAME = "blackbox-autouse"
+
+_run_id: Optional[str] = None
+
+
+def run_id() -> str:
+    """Return the runId shared by every bundle of this process, generated on first use."""
+    global _run_id
+    if _run_id is None:
+        import uuid
+
+        _run_id = str(uuid.uuid4())
+    return _run_id
+
+
+def __getattr__(name: str) -> Any:
+    # Keep the historical module attribute without paying for uuid at import time.
+    if name == "RUN_ID":
+        return run_id()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def utc_now() -> datetime:
@@ -30,17 +67,9 @@ def bundle_ts(dt: datetime) -> str:
 
 
 def sha1_16(value: str) -> str:
-    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
-
+    import hashlib
 
-def to_json_value(value: Any) -> Any:
-    if value is None or isinstance(value, (str, int, float, bool)):
-        return value
-    if isinstance(value, (list, tuple)):
-        return [to_json_value(v) for v in value]
-    if isinstance(value, dict):
-        return {str(k): to_json_value(v) for k, v in value.items()}
-    return str(value)
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
 
 
 def sanitize_filename(name: str) -> str:
@@ -50,11 +79,62 @@ def sanitize_filename(name: str) -> str:
     return safe or "attachment"
 
 
+def is_truthy(value: Any) -> bool:
+    return str(value).strip().lower() in TRUTHY
+
+
 def autouse_enabled(config) -> bool:
     if config.getoption("blackbox_autouse"):
         return True
-    value = str(config.getini("blackbox_autouse")).strip().lower()
-    return value in {"1", "true", "yes", "on"}
+    return is_truthy(config.getini("blackbox_autouse"))
+
+
+def build_redactor(config) -> Optional[Redactor]:
+    from .redact import DEFAULT_KEY_RULES, Redactor
+
+    value = os.environ.get("BLACKBOX_REDACT")
+    enabled = is_truthy(value) if value is not None else is_truthy(config.getini("blackbox_redact"))
+    if not enabled:
+        return None
+    keys = [*DEFAULT_KEY_RULES, *config.getini("blackbox_redact_keys")]
+    patterns = {
+        f"custom_{i}": pattern
+        for i, pattern in enumerate(config.getini("blackbox_redact_patterns"))
+        if pattern.strip()
+    }
+    return Redactor(keys, patterns)
+
+
+def session_redactor(config) -> Optional[Redactor]:
+    """Return the redactor for this session (None when disabled), building it once."""
+    if REDACTOR_KEY not in config.stash:
+        try:
+            config.stash[REDACTOR_KEY] = build_redactor(config)
+        except re.error as exc:
+            raise pytest.UsageError(f"blackbox_redact_patterns: {exc}") from exc
+    return config.stash[REDACTOR_KEY]
+
+
+def session_environment(config) -> Environment:
+    """Return the environment probed for this session, probing (and redacting) it once."""
+    environment = config.stash.get(ENVIRONMENT_KEY, None)
+    if environment is None:
+        from .environment import DEFAULT_ENV_ALLOWLIST, probe_environment
+
+        allowlist = [*DEFAULT_ENV_ALLOWLIST, *config.getini("blackbox_env")]
+        environment = probe_environment(config.rootpath, allowlist)
+        redactor = session_redactor(config)
+        if redactor is not None:
+            environment = environment.redacted(redactor)
+        config.stash[ENVIRONMENT_KEY] = environment
+    return environment
+
+
+def inert_enabled(config) -> bool:
+    value = os.environ.get("BLACKBOX_INERT")
+    if value is not None:
+        return is_truthy(value)
+    return is_truthy(config.getini("blackbox_inert"))
 
 
 @dataclass
@@ -66,16 +146,20 @@ class State:
     run_id: str
     context: Dict[str, Any] = field(default_factory=dict)
     steps: List[Dict[str, Any]] = field(default_factory=list)
-    attachments: List[Tuple[str, str]] = field(default_factory=list)
+    # Text content, or a Path that is streamed into the bundle on failure.
+    attachments: List[Tuple[str, Union[str, Path]]] = field(default_factory=list)
     parameters: Optional[Dict[str, Any]] = None
 
 
 class BlackBoxRecorder:
+    # Override in conftest.py (e.g. `BlackBoxRecorder.limits = JsonLimits(max_depth=8)`).
+    limits: JsonLimits = DEFAULT_LIMITS
+
     def __init__(self, state: State) -> None:
         self._state = state
 
     def log(self, key: str, value: Any) -> None:
-        self._state.context[key] = to_json_value(value)
+        self._state.context[key] = to_json_value(value, self.limits)
 
     def step(self, message: str, level: str = "INFO", data: Any = None) -> None:
         level_norm = level.upper() if level else "INFO"
@@ -87,12 +171,16 @@ class BlackBoxRecorder:
             "message": message,
         }
         if data is not None:
-            entry["data"] = to_json_value(data)
+            entry["data"] = to_json_value(data, self.limits)
         self._state.steps.append(entry)
 
     def attach(self, name: str, content: str) -> None:
         self._state.attachments.append((sanitize_filename(name), content or ""))
 
+    def attach_file(self, path: Union[str, Path], name: Optional[str] = None) -> None:
+        path = Path(path).absolute()
+        self._state.attachments.append((sanitize_filename(name or path.name), path))
+
 
 def create_state(item) -> State:
     nodeid = item.nodeid
@@ -106,7 +194,8 @@ def create_state(item) -> State:
 
     parameters = None
     if hasattr(item, "callspec"):
-        params = {k: to_json_value(v) for k, v in item.callspec.params.items()}
+        limits = BlackBoxRecorder.limits
+        params = {k: to_json_value(v, limits) for k, v in item.callspec.params.items()}
         if params:
             parameters = params
 
@@ -115,7 +204,7 @@ def create_state(item) -> State:
         test_name=test_name,
         test_id=test_id,
         start_time=utc_now(),
-        run_id=RUN_ID,
+        run_id=run_id(),
         parameters=parameters,
     )
 
@@ -131,11 +220,61 @@ def get_state(item) -> State:
     return item._blackbox_state
 
 
+def peek_state(item) -> Optional[State]:
+    stash = getattr(item, "stash", None)
+    if stash is not None:
+        return stash.get(STASH_KEY, None)
+    return getattr(item, "_blackbox_state", None)
+
+
 def output_dir() -> str:
     return os.environ.get("BLACKBOX_OUTPUT_DIR", "blackbox-reports")
 
 
-def write_context_log(state: State, path: Path, end_time: datetime, duration_ms: int) -> None:
+def json_backend(config=None) -> str:
+    value = os.environ.get("BLACKBOX_JSON_BACKEND")
+    if value is None and config is not None:
+        value = config.getini("blackbox_json_backend")
+    return (value or "").strip().lower() or "auto"
+
+
+def json_encoder(config=None) -> JsonEncoder:
+    return get_encoder(json_backend(config))
+
+
+def compact_json(config=None) -> bool:
+    value = os.environ.get("BLACKBOX_JSON_COMPACT")
+    if value is not None:
+        return is_truthy(value)
+    return config is not None and is_truthy(config.getini("blackbox_json_compact"))
+
+
+def session_json(config) -> Tuple[JsonEncoder, bool]:
+    """Return this session's (encoder, compact) settings, resolving them once."""
+    settings = config.stash.get(JSON_KEY, None)
+    if settings is None:
+        try:
+            settings = (json_encoder(config), compact_json(config))
+        except ValueError as exc:
+            raise pytest.UsageError(f"blackbox_json_backend: {exc}") from exc
+        config.stash[JSON_KEY] = settings
+    return settings
+
+
+@functools.lru_cache(maxsize=None)
+def default_environment() -> Environment:
+    """Environment for bundles written outside a configured session."""
+    from .environment import probe_environment
+
+    return probe_environment()
+
+
+def write_context_log(
+    state: State, path: Path, end_time: datetime, duration_ms: int, encoder: JsonEncoder
+) -> None:
+    def inline(value: Any) -> str:
+        return encoder.dumps(value, compact=True).decode("utf-8")
+
     lines = []
     lines.append("BlackBox context log")
     lines.append(f"testClass={state.test_class}")
@@ -151,7 +290,7 @@ def write_context_log(state: State, path: Path, end_time: datetime, duration_ms:
         lines.append("- (none)")
     else:
         for k, v in state.context.items():
-            lines.append(f"- {k}: {json.dumps(v)}")
+            lines.append(f"- {k}: {inline(v)}")
     lines.append("")
     lines.append("steps:")
     if not state.steps:
@@ -159,12 +298,46 @@ def write_context_log(state: State, path: Path, end_time: datetime, duration_ms:
     else:
         for s in state.steps:
             data = s.get("data")
-            extra = f" | data={json.dumps(data)}" if data is not None else ""
+            extra = f" | data={inline(data)}" if data is not None else ""
             lines.append(f"- [{s['ts']}] {s['level']} {s['message']}{extra}")
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-
-
-def write_bundle(state: State, excinfo, report) -> None:
+    # Lone surrogates (surrogateescape'd paths, env values) are written as escapes.
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8", errors="backslashreplace")
+
+
+def write_attachment(target: Path, content: Union[str, Path], redactor: Optional[Redactor]) -> int:
+    """Write one attachment and return the number of redacted matches."""
+    if isinstance(content, Path):
+        try:
+            if redactor is not None:
+                return redactor.copy_file(content, target)
+            import shutil
+
+            shutil.copyfile(content, target)
+            return 0
+        except OSError as exc:
+            content = f"<attachment unavailable: {exc}>"
+    count = 0
+    if redactor is not None:
+        content, count = redactor.redact_text(content)
+    target.write_text(content, encoding="utf-8", errors="backslashreplace")
+    return count
+
+
+def write_bundle(
+    state: State,
+    excinfo,
+    report,
+    redactor: Optional[Redactor] = None,
+    environment: Optional[Environment] = None,
+    encoder: Optional[JsonEncoder] = None,
+    compact: Optional[bool] = None,
+) -> None:
+    if environment is None:
+        environment = default_environment()
+    if encoder is None:
+        encoder = json_encoder()
+    if compact is None:
+        compact = compact_json()
     end_time = utc_now()
     duration_ms = int((end_time - state.start_time).total_seconds() * 1000)
 
@@ -177,18 +350,6 @@ def write_bundle(state: State, excinfo, report) -> None:
     bundle_dir = out_path / bundle_name
     bundle_dir.mkdir(parents=True, exist_ok=True)
 
-    if state.attachments:
-        attachments_dir = bundle_dir / "attachments"
-        attachments_dir.mkdir(parents=True, exist_ok=True)
-        name_counts: Dict[str, int] = {}
-        for name, content in state.attachments:
-            count = name_counts.get(name, 0)
-            name_counts[name] = count + 1
-            final_name = name if count == 0 else f"{name}-{count}"
-            (attachments_dir / final_name).write_text(content, encoding="utf-8")
-
-    write_context_log(state, bundle_dir / "context.log", end_time, duration_ms)
-
     exc_type = excinfo.type.__name__ if excinfo else "Exception"
     exc_message = str(excinfo.value) if excinfo else "Test failed"
     exc_stack = report.longreprtext if hasattr(report, "longreprtext") else None
@@ -200,6 +361,29 @@ def write_bundle(state: State, excinfo, report) -> None:
     if exc_stack:
         exception["stackTrace"] = exc_stack
 
+    redactions: List[str] = list(environment.redactions)
+    if redactor is not None:
+        state = dataclasses.replace(
+            state,
+            context=redactor.redact_value(state.context, "/context", redactions),
+            steps=redactor.redact_value(state.steps, "/steps", redactions),
+            parameters=redactor.redact_value(state.parameters, "/meta/parameters", redactions),
+        )
+        exception = redactor.redact_value(exception, "/exception", redactions)
+
+    if state.attachments:
+        attachments_dir = bundle_dir / "attachments"
+        attachments_dir.mkdir(parents=True, exist_ok=True)
+        name_counts: Dict[str, int] = {}
+        for name, content in state.attachments:
+            count = name_counts.get(name, 0)
+            name_counts[name] = count + 1
+            final_name = name if count == 0 else f"{name}-{count}"
+            if write_attachment(attachments_dir / final_name, content, redactor):
+                redactions.append(f"attachments/{final_name}")
+
+    write_context_log(state, bundle_dir / "context.log", end_time, duration_ms, encoder)
+
     manifest: Dict[str, Any] = {
         "schemaVersion": 1,
         "meta": {
@@ -210,13 +394,7 @@ def write_bundle(state: State, excinfo, report) -> None:
             "timestamp": iso_ts(end_time),
             "durationMs": duration_ms,
             "runId": state.run_id,
-            "framework": {"name": "pytest", "version": pytest.__version__},
-            "runtime": {
-                "language": "python",
-                "version": platform.python_version(),
-                "os": platform.system(),
-                "arch": platform.machine(),
-            },
+            **environment.meta(),
         },
         "context": state.context,
         "steps": state.steps,
@@ -230,14 +408,93 @@ def write_bundle(state: State, excinfo, report) -> None:
     if state.parameters:
         manifest["meta"]["parameters"] = state.parameters
 
+    if redactions:
+        manifest["meta"]["redactions"] = redactions
+
     if (bundle_dir / "attachments").is_dir():
         manifest["artifacts"]["attachmentsDir"] = "attachments/"
 
-    (bundle_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    (bundle_dir / "manifest.json").write_bytes(encoder.dumps(manifest, compact=compact))
+
+
+class LazyRecorderHooks:
+    """Bundle writer for inert mode: only items that requested `blackbox` have state."""
+
+    def state_for(self, item) -> Optional[State]:
+        return peek_state(item)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        if report.when == "call" and report.failed:
+            state = self.state_for(item)
+            if state is not None:
+                config = item.config
+                encoder, compact = session_json(config)
+                write_bundle(
+                    state,
+                    call.excinfo,
+                    report,
+                    session_redactor(config),
+                    session_environment(config),
+                    encoder,
+                    compact,
+                )
+
+
+class RecorderHooks(LazyRecorderHooks):
+    """Default mode: every item gets state, so every failing test produces a bundle."""
+
+    def state_for(self, item) -> Optional[State]:
+        return get_state(item)
+
+    def pytest_runtest_setup(self, item):
+        state = get_state(item)
+        state.start_time = utc_now()
+
+
+class AutouseFixture:
+    @pytest.fixture(autouse=True)
+    def _blackbox_autouse(self, request):
+        state = get_state(request.node)
+        request.node.blackbox = BlackBoxRecorder(state)
 
 
 def pytest_addoption(parser) -> None:
     parser.addini("blackbox_autouse", "Enable blackbox autouse fixture", default="false")
+    parser.addini(
+        "blackbox_inert",
+        "Register no per-test hooks until the blackbox fixture is requested",
+        default="false",
+    )
+    parser.addini("blackbox_redact", "Scrub secrets from bundles", default="true")
+    parser.addini(
+        "blackbox_redact_keys",
+        "Extra key names whose values are always redacted",
+        type="args",
+        default=[],
+    )
+    parser.addini(
+        "blackbox_redact_patterns",
+        "Extra regular expressions (one per line) whose matches are redacted",
+        type="linelist",
+        default=[],
+    )
+    parser.addini(
+        "blackbox_json_backend",
+        "JSON backend for manifest.json: auto, orjson, msgspec or json",
+        default="auto",
+    )
+    parser.addini(
+        "blackbox_json_compact", "Write manifest.json without indentation", default="false"
+    )
+    parser.addini(
+        "blackbox_env",
+        "Extra environment variable names or fnmatch patterns recorded in meta.env",
+        type="args",
+        default=[],
+    )
     group = parser.getgroup("blackbox")
     group.addoption(
         "--blackbox-autouse",
@@ -246,29 +503,29 @@ def pytest_addoption(parser) -> None:
     )
 
 
+def pytest_configure(config) -> None:
+    # Only the backend name is checked up front; inert sessions import the encoder
+    # and compile the redactor when the blackbox fixture is first requested.
+    try:
+        check_backend(json_backend(config))
+    except ValueError as exc:
+        raise pytest.UsageError(f"blackbox_json_backend: {exc}") from exc
+    if inert_enabled(config):
+        return
+    session_json(config)
+    session_redactor(config)
+    session_environment(config)
+    config.pluginmanager.register(RecorderHooks(), HOOKS_PLUGIN_NAME)
+    if autouse_enabled(config):
+        config.pluginmanager.register(AutouseFixture(), AUTOUSE_PLUGIN_NAME)
+
+
 @pytest.fixture
 def blackbox(request):
+    pluginmanager = request.config.pluginmanager
+    if not pluginmanager.has_plugin(HOOKS_PLUGIN_NAME):
+        session_json(request.config)
+        session_redactor(request.config)
+        pluginmanager.register(LazyRecorderHooks(), HOOKS_PLUGIN_NAME)
     state = get_state(request.node)
     return BlackBoxRecorder(state)
-
-
-@pytest.fixture(autouse=True)
-def _blackbox_autouse(request):
-    if autouse_enabled(request.config):
-        state = get_state(request.node)
-        request.node.blackbox = BlackBoxRecorder(state)
-    yield
-
-
-def pytest_runtest_setup(item):
-    state = get_state(item)
-    state.start_time = utc_now()
-
-
-@pytest.hookimpl(hookwrapper=True)
-def pytest_runtest_makereport(item, call):
-    outcome = yield
-    report = outcome.get_result()
-    if report.when == "call" and report.failed:
-        state = get_state(item)
-        write_bundle(state, call.excinfo, report)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REDACTED = "[REDACTED]"
+
+# Matched against the whole key or its suffix with case and "-", "_", ".", " "
+# ignored, so "db_password", "X-Api-Key" and "sessionId" are covered while
+# "token_count", "max_tokens" and "secretary" are not.
+DEFAULT_KEY_RULES = (
+    "password",
+    "passwd",
+    "secret",
+    "token",
+    "apikey",
+    "accesskey",
+    "privatekey",
+    "authorization",
+    "cookie",
+    "cookies",
+    "credential",
+    "credentials",
+    "sessionid",
+)
+
+# Line-local patterns (except private_key), combined into one alternation.
+# Only scoped inline flags and non-capturing groups, so `lastgroup` names the rule.
+DEFAULT_VALUE_PATTERNS = {
+    "private_key": (r"-----BEGIN [A-Z ]*PRIVATE KEY-----[\s\S]*?-----END [A-Z ]*PRIVATE KEY-----"),
+    "bearer": r"(?i:\bbearer\s+)[A-Za-z0-9\-._~+/]+=*",
+    "aws_access_key": r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    "github_token": r"\bgh[pousr]_[A-Za-z0-9]{36,}\b",
+    "slack_token": r"\bxox[abprs]-[A-Za-z0-9-]{10,}",
+    "jwt": r"\beyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+",
+    "url_credentials": r"(?<=://)[^/\s:@]+:[^/\s@]+(?=@)",
+    "assignment": (
+        r"(?i:\b(?:password|passwd|pwd|secret|token|api[_-]?key|access[_-]?key)"
+        r"\s*[=:]\s*)[^\s&;,'\"]+"
+    ),
+}
+
+# Rules whose match keeps everything up to the separator (and any blanks after it),
+# e.g. "password=", "token: " or the user in "user:pass@".
+_KEEP_PREFIX = {"bearer": " ", "url_credentials": ":", "assignment": "=:"}
+
+# Lowercase literals at least one of which occurs in any match of the default
+# patterns. Text without them skips the combined regex, and only the lines that
+# contain one are scanned, which keeps clean logs at close to copy speed.
+_TRIGGERS = (
+    r"-----begin|bearer|akia|asia|gh[pousr]_|xox|eyj|://"
+    r"|pass(?:wor)?d|pwd|secret|token|api[_-]?key|access[_-]?key"
+)
+
+_SNIFF_BYTES = 8192
+
+
+def _normalize_key(key: str) -> str:
+    return key.lower().replace("-", "").replace("_", "").replace(".", "").replace(" ", "")
+
+
+def _maybe_secret(value: Any) -> bool:
+    # Numbers, bools and None under a secret-looking key ("has_password": true,
+    # "refresh_token": 0) carry no secret; strings and containers may.
+    return isinstance(value, (str, dict, list)) and len(value) > 0
+
+
+def _pointer_token(key: Any) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+class Redactor:
+    """Scrub secrets from recorded data with one precompiled matcher for keys and one for values.
+
+    Redacted locations are appended to the `found` list passed in: JSON Pointers
+    into the manifest (e.g. "/context/password") or bundle-relative attachment paths.
+    """
+
+    def __init__(
+        self,
+        key_rules: Iterable[str] = DEFAULT_KEY_RULES,
+        value_patterns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        rules = sorted({_normalize_key(r) for r in key_rules if r.strip()})
+        alternation = "|".join(map(re.escape, rules))
+        self._key_re = re.compile(f"(?:{alternation})$") if rules else None
+        patterns = dict(DEFAULT_VALUE_PATTERNS)
+        patterns.update(value_patterns or {})
+        combined = "|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns.items())
+        self._value_re = re.compile(combined)
+        self._bytes_re = re.compile(combined.encode("utf-8"))
+        # Custom patterns may match anything, so they disable the prefilter.
+        self._trigger_re = None if value_patterns else re.compile(_TRIGGERS)
+        self._bytes_trigger_re = None if value_patterns else re.compile(_TRIGGERS.encode("ascii"))
+
+    def key_matches(self, key: str) -> bool:
+        return self._key_re is not None and self._key_re.search(_normalize_key(key)) is not None
+
+    def _replace(self, match: "re.Match[str]") -> str:
+        separators = _KEEP_PREFIX.get(match.lastgroup or "")
+        if separators:
+            text = match.group()
+            cut = min((i for i in (text.find(s) for s in separators) if i >= 0), default=-1)
+            if cut >= 0:
+                end = cut + 1
+                while end < len(text) and text[end] in " \t":
+                    end += 1
+                return text[:end] + REDACTED
+        return REDACTED
+
+    def _replace_bytes(self, match: "re.Match[bytes]") -> bytes:
+        return self._replace(_DecodedMatch(match)).encode("utf-8")
+
+    def redact_text(self, text: str) -> Tuple[str, int]:
+        """Return `text` with secrets replaced and the number of replacements."""
+        lowered = text.lower()
+        if self._trigger_re is None or len(lowered) != len(text):
+            return self._value_re.subn(self._replace, text)
+        parts: List[str] = []
+        count = done = 0
+        for hit in self._trigger_re.finditer(lowered):
+            if hit.start() < done:
+                continue
+            # Rescan the whole line around the hit; a key block may span to the end.
+            start = max(text.rfind("\n", 0, hit.start()) + 1, done)
+            end = len(text) if hit.group() == "-----begin" else text.find("\n", hit.end())
+            if end < 0:
+                end = len(text)
+            new, n = self._value_re.subn(self._replace, text[start:end])
+            parts.append(text[done:start])
+            parts.append(new)
+            count += n
+            done = end
+        if not parts:
+            return text, 0
+        parts.append(text[done:])
+        return "".join(parts), count
+
+    def redact_value(self, value: Any, pointer: str, found: List[str]) -> Any:
+        """Return `value` with secrets replaced; unchanged containers are returned as is."""
+        if isinstance(value, str):
+            new, count = self.redact_text(value)
+            if count:
+                found.append(pointer)
+                return new
+            return value
+        if isinstance(value, dict):
+            out: Optional[Dict[str, Any]] = None
+            for key, item in value.items():
+                child = f"{pointer}/{_pointer_token(key)}"
+                if _maybe_secret(item) and self.key_matches(str(key)):
+                    new_item: Any = REDACTED
+                    found.append(child)
+                else:
+                    new_item = self.redact_value(item, child, found)
+                if new_item is not item:
+                    if out is None:
+                        out = dict(value)
+                    out[key] = new_item
+            return value if out is None else out
+        if isinstance(value, list):
+            items: Optional[List[Any]] = None
+            for index, item in enumerate(value):
+                new_item = self.redact_value(item, f"{pointer}/{index}", found)
+                if new_item is not item:
+                    if items is None:
+                        items = list(value)
+                    items[index] = new_item
+            return value if items is None else items
+        return value
+
+    def copy_file(self, src: Path, dst: Path) -> int:
+        """Stream `src` to `dst` line by line, scrubbing secrets; return the number replaced.
+
+        Files that look binary (a NUL byte near the start) are copied verbatim.
+        Private key blocks are dropped between their BEGIN and END lines.
+        """
+        count = 0
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            head = fin.read(_SNIFF_BYTES)
+            if b"\0" in head:
+                fout.write(head)
+                shutil.copyfileobj(fin, fout)
+                return 0
+            fin.seek(0)
+            in_key = False
+            trigger = self._bytes_trigger_re
+            for line in fin:
+                if not in_key and trigger is not None and not trigger.search(line.lower()):
+                    fout.write(line)
+                    continue
+                if in_key:
+                    if b"PRIVATE KEY-----" in line and b"-----END " in line:
+                        in_key = False
+                    continue
+                if b"-----BEGIN " in line and b"PRIVATE KEY-----" in line:
+                    if b"-----END " not in line:
+                        in_key = True
+                    fout.write(REDACTED.encode("utf-8") + b"\n")
+                    count += 1
+                    continue
+                new, n = self._bytes_re.subn(self._replace_bytes, line)
+                count += n
+                fout.write(new)
+        return count
+
+
+class _DecodedMatch:
+    """Adapts a bytes match to the str interface used by `Redactor._replace`."""
+
+    __slots__ = ("lastgroup", "_text")
+
+    def __init__(self, match: "re.Match[bytes]") -> None:
+        self.lastgroup = match.lastgroup
+        self._text = match.group().decode("utf-8", "replace")
+
+    def group(self) -> str:
+        return self._text
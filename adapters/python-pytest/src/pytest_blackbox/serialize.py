@@ -0,0 +1,473 @@
+from __future__ import annotations
+
+import dataclasses
+import enum
+import functools
+import math
+from collections.abc import Mapping
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+CYCLE_MARKER = "<cycle>"
+DEPTH_MARKER = "<max depth exceeded>"
+BUDGET_MARKER = "<byte budget exceeded>"
+TRUNCATED_KEY = "<truncated>"
+
+_ATOM_TYPES = {type(None), bool, int}
+
+JSON_BACKENDS = ("orjson", "msgspec", "json")
+
+
+@dataclass(frozen=True)
+class JsonLimits:
+    """Bounds applied while converting a single recorded value.
+
+    `max_bytes` is an approximate budget for the encoded size of the value;
+    once it is spent, a container ends with a single marker in place of the
+    remaining members.
+    """
+
+    max_depth: int = 32
+    max_items: int = 1000
+    max_string: int = 64 * 1024
+    max_bytes: int = 1024 * 1024
+
+
+DEFAULT_LIMITS = JsonLimits()
+
+
+def to_json_value(value: Any, limits: JsonLimits = DEFAULT_LIMITS) -> Any:
+    """Return a JSON-safe snapshot of `value`.
+
+    Plain JSON data is copied (containers) or returned as is (scalars); other
+    types are converted by the handlers registered on `_dispatch`, and anything
+    unknown falls back to `str(value)`.
+    """
+    cls = type(value)
+    if cls in _ATOM_TYPES:
+        return value
+    if cls is str and len(value) <= limits.max_string:
+        return value
+    if cls is dict or cls is list or cls is tuple:
+        try:
+            return _plain_copier(limits)(value, 0, limits.max_bytes)[0]
+        except _NotPlain:
+            pass
+    return _Converter(limits).convert(value, 0)
+
+
+def register_json_type(cls: type, fn: Callable[[Any], Any]) -> None:
+    """Convert instances of `cls` with `fn`; its result is converted in turn."""
+    _dispatch.register(cls, lambda value, conv, depth: conv.convert(fn(value), depth))
+    _handlers.clear()
+
+
+class _NotPlain(Exception):
+    """Raised by the plain-data copier to hand the value to `_Converter`."""
+
+
+@functools.lru_cache(maxsize=None)
+def _plain_copier(limits: JsonLimits) -> Callable[[Any, int, int], Tuple[Any, int]]:
+    """Return a copier for plain JSON data: exact dicts with str keys, lists, tuples, scalars.
+
+    `copy(value, depth, budget)` returns `(copy, approximate encoded size)` and
+    raises `_NotPlain` on any other type, a non-finite float or a limit that
+    would need truncation, including as soon as the size exceeds `budget`. The
+    depth limit also bounds cycles. Doing none of the per-value bookkeeping of
+    `_Converter`, it is the fast path for the common case of recorded plain data.
+    """
+    max_depth, max_items, max_string = limits.max_depth, limits.max_items, limits.max_string
+    atoms = _ATOM_TYPES
+
+    def copy(value: Any, depth: int, budget: int) -> Tuple[Any, int]:
+        if depth >= max_depth or len(value) > max_items:
+            raise _NotPlain
+        size = 2
+        if type(value) is dict:
+            out: Any = {}
+            for k, v in value.items():
+                cls = type(v)
+                if cls is str:
+                    if len(v) > max_string:
+                        raise _NotPlain
+                    size += len(v) + 3
+                    out[k] = v
+                elif cls in atoms:
+                    size += 6
+                    out[k] = v
+                elif cls is float:
+                    if v - v != 0.0:  # inf or nan
+                        raise _NotPlain
+                    size += 9
+                    out[k] = v
+                elif cls is dict or cls is list or cls is tuple:
+                    out[k], n = copy(v, depth + 1, budget - size)
+                    size += n
+                else:
+                    raise _NotPlain
+                if type(k) is not str:
+                    raise _NotPlain
+                size += len(k) + 3
+                if size > budget:
+                    raise _NotPlain
+            return out, size
+        out = []
+        append = out.append
+        for v in value:
+            cls = type(v)
+            if cls is str:
+                if len(v) > max_string:
+                    raise _NotPlain
+                size += len(v) + 3
+                append(v)
+            elif cls in atoms:
+                size += 6
+                append(v)
+            elif cls is float:
+                if v - v != 0.0:
+                    raise _NotPlain
+                size += 9
+                append(v)
+            elif cls is dict or cls is list or cls is tuple:
+                item, n = copy(v, depth + 1, budget - size)
+                size += n
+                append(item)
+            else:
+                raise _NotPlain
+            if size > budget:
+                raise _NotPlain
+        return out, size
+
+    return copy
+
+
+class _Converter:
+    __slots__ = ("limits", "budget", "active")
+
+    def __init__(self, limits: JsonLimits) -> None:
+        self.limits = limits
+        self.budget = limits.max_bytes
+        # ids of the containers on the current path; shared (non-cyclic) references are fine.
+        self.active: set = set()
+
+    def convert(self, value: Any, depth: int) -> Any:
+        if self.budget <= 0:
+            return BUDGET_MARKER
+        cls = type(value)
+        if cls in _ATOM_TYPES:
+            self.budget -= 5
+            return value
+        if cls is str:
+            return self.text(value)
+        if cls is float:
+            self.budget -= 8
+            return value if math.isfinite(value) else repr(value)
+        if depth >= self.limits.max_depth:
+            return DEPTH_MARKER
+        # Exact builtin containers skip the singledispatch lookup.
+        if cls is dict:
+            return self.mapping(value, value.items(), len(value), depth)
+        if cls is list or cls is tuple:
+            return self.sequence(value, value, len(value), depth)
+        try:
+            handler = _handlers[cls]
+        except KeyError:
+            handler = _resolve_handler(cls)
+        return handler(value, self, depth)
+
+    def text(self, value: str) -> str:
+        limit = self.limits.max_string
+        if self.budget <= 0:
+            return BUDGET_MARKER
+        if len(value) > limit:
+            value = f"{value[:limit]}...<truncated {len(value) - limit} chars>"
+        self.budget -= len(value) + 2
+        return value
+
+    def sequence(self, value: Any, items: Iterable[Any], size: int, depth: int) -> Any:
+        key = id(value)
+        if key in self.active:
+            return CYCLE_MARKER
+        limit = self.limits.max_items
+        max_string = self.limits.max_string
+        self.active.add(key)
+        try:
+            out: List[Any] = []
+            convert = self.convert
+            for index, item in enumerate(items):
+                if index >= limit:
+                    out.append(f"<truncated {size - limit} items>")
+                    break
+                if self.budget <= 0:
+                    out.append(BUDGET_MARKER)
+                    break
+                cls = type(item)
+                if cls in _ATOM_TYPES:
+                    self.budget -= 5
+                    out.append(item)
+                elif cls is str and len(item) <= max_string:
+                    self.budget -= len(item) + 2
+                    out.append(item)
+                else:
+                    out.append(convert(item, depth + 1))
+            self.budget -= 2
+            return out
+        finally:
+            self.active.discard(key)
+
+    def mapping(self, value: Any, items: Iterable[Any], size: int, depth: int) -> Any:
+        key = id(value)
+        if key in self.active:
+            return CYCLE_MARKER
+        limit = self.limits.max_items
+        max_string = self.limits.max_string
+        self.active.add(key)
+        try:
+            out: Dict[str, Any] = {}
+            convert = self.convert
+            budget = 2
+            for index, (k, v) in enumerate(items):
+                if index >= limit:
+                    out[TRUNCATED_KEY] = f"<truncated {size - limit} items>"
+                    break
+                name = k if type(k) is str else _safe_str(k)
+                if budget >= self.budget:
+                    out[name] = BUDGET_MARKER
+                    break
+                cls = type(v)
+                # Plain scalars are copied inline; budget is settled before recursing.
+                if cls in _ATOM_TYPES:
+                    budget += len(name) + 8
+                    out[name] = v
+                elif cls is str and len(v) <= max_string and budget + len(v) < self.budget:
+                    budget += len(name) + len(v) + 5
+                    out[name] = v
+                else:
+                    self.budget -= budget + len(name) + 3
+                    budget = 0
+                    out[name] = convert(v, depth + 1)
+            self.budget -= budget
+            return out
+        finally:
+            self.active.discard(key)
+
+
+def _safe_str(value: Any) -> str:
+    try:
+        return str(value)
+    except Exception:
+        return f"<unrepresentable {type(value).__name__}>"
+
+
+@functools.singledispatch
+def _dispatch(value: Any, conv: _Converter, depth: int) -> Any:
+    return conv.text(_safe_str(value))
+
+
+# Resolved handler per type, so repeated values skip the singledispatch lookup
+# and the dataclass check. A plain dict (a weak one adds ~0.25 µs per lookup),
+# emptied when it grows past _MAX_HANDLERS and by register_json_type.
+_handlers: Dict[type, Callable[[Any, _Converter, int], Any]] = {}
+_MAX_HANDLERS = 512
+
+
+def _resolve_handler(cls: type) -> Callable[[Any, _Converter, int], Any]:
+    handler = _dispatch.dispatch(cls)
+    if handler is _dispatch.registry[object] and dataclasses.is_dataclass(cls):
+        handler = _dataclass_handler(tuple(f.name for f in dataclasses.fields(cls)))
+    if len(_handlers) >= _MAX_HANDLERS:
+        _handlers.clear()
+    _handlers[cls] = handler
+    return handler
+
+
+def _dataclass_handler(names: Tuple[str, ...]) -> Callable[[Any, _Converter, int], Any]:
+    def handler(value: Any, conv: _Converter, depth: int) -> Any:
+        fields = [(name, getattr(value, name)) for name in names]
+        return conv.mapping(value, fields, len(fields), depth)
+
+    return handler
+
+
+# Mixin enums (`class Status(str, Enum)`) dispatch to the str/int/float handlers
+# rather than the Enum one, so those handlers serialize members by value.
+@_dispatch.register(str)
+def _(value: str, conv: _Converter, depth: int) -> Any:
+    if isinstance(value, enum.Enum):
+        return conv.convert(value.value, depth)
+    return conv.text(str(value))
+
+
+@_dispatch.register(int)
+def _(value: int, conv: _Converter, depth: int) -> Any:
+    if isinstance(value, enum.Enum):
+        return conv.convert(value.value, depth)
+    conv.budget -= 8
+    return int(value)
+
+
+@_dispatch.register(float)
+def _(value: float, conv: _Converter, depth: int) -> Any:
+    if isinstance(value, enum.Enum):
+        return conv.convert(value.value, depth)
+    return conv.convert(float(value), depth)
+
+
+@_dispatch.register(list)
+@_dispatch.register(tuple)
+def _(value: Any, conv: _Converter, depth: int) -> Any:
+    return conv.sequence(value, value, len(value), depth)
+
+
+@_dispatch.register(AbstractSet)
+def _(value: Any, conv: _Converter, depth: int) -> Any:
+    try:
+        items = sorted(value)
+    except TypeError:
+        items = list(value)
+    return conv.sequence(value, items, len(items), depth)
+
+
+@_dispatch.register(Mapping)
+def _(value: Any, conv: _Converter, depth: int) -> Any:
+    return conv.mapping(value, value.items(), len(value), depth)
+
+
+@_dispatch.register(enum.Enum)
+def _(value: enum.Enum, conv: _Converter, depth: int) -> Any:
+    return conv.convert(value.value, depth)
+
+
+@_dispatch.register(date)
+@_dispatch.register(time)
+def _(value: Any, conv: _Converter, depth: int) -> Any:
+    return conv.text(value.isoformat())
+
+
+@_dispatch.register(timedelta)
+def _(value: timedelta, conv: _Converter, depth: int) -> Any:
+    return conv.convert(value.total_seconds(), depth)
+
+
+@_dispatch.register(bytes)
+@_dispatch.register(bytearray)
+@_dispatch.register(memoryview)
+def _(value: Any, conv: _Converter, depth: int) -> Any:
+    raw = bytes(value)
+    limit = conv.limits.max_string
+    dropped = max(len(raw) - limit, 0)
+    raw = raw[:limit]
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        import base64
+
+        text = "base64:" + base64.b64encode(raw).decode("ascii")
+    if dropped:
+        text += f"...<truncated {dropped} bytes>"
+    conv.budget -= len(text) + 2
+    return text
+
+
+@_dispatch.register(BaseException)
+def _(value: BaseException, conv: _Converter, depth: int) -> Any:
+    fields = [("type", type(value).__name__), ("message", _safe_str(value))]
+    return conv.mapping(value, fields, len(fields), depth)
+
+
+class JsonEncoder:
+    """A JSON backend; `dumps` returns UTF-8 bytes, indented by 2 unless `compact`."""
+
+    # A plain class rather than a dataclass: building one costs ~1 ms at import.
+    __slots__ = ("name", "_dumps", "_errors")
+
+    def __init__(
+        self, name: str, dumps: Callable[[Any, bool], bytes], errors: Tuple[type, ...] = ()
+    ) -> None:
+        self.name = name
+        self._dumps = dumps
+        self._errors = errors
+
+    def __repr__(self) -> str:
+        return f"JsonEncoder({self.name!r})"
+
+    def dumps(self, value: Any, compact: bool = False) -> bytes:
+        if not self._errors:
+            return self._dumps(value, compact)
+        try:
+            return self._dumps(value, compact)
+        except self._errors:
+            # e.g. integers wider than 64 bits, which only the stdlib encodes.
+            return _stdlib_dumps(value, compact)
+
+
+def _stdlib_dumps(value: Any, compact: bool) -> bytes:
+    import json
+
+    if compact:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return json.dumps(value, indent=2).encode("utf-8")
+
+
+def _orjson_encoder() -> JsonEncoder:
+    import orjson
+
+    def dumps(value: Any, compact: bool) -> bytes:
+        return orjson.dumps(value, option=0 if compact else orjson.OPT_INDENT_2)
+
+    return JsonEncoder("orjson", dumps, (orjson.JSONEncodeError,))
+
+
+def _msgspec_encoder() -> JsonEncoder:
+    import msgspec
+
+    encode = msgspec.json.Encoder().encode
+
+    def dumps(value: Any, compact: bool) -> bytes:
+        raw = encode(value)
+        return raw if compact else msgspec.json.format(raw, indent=2)
+
+    # ValueError covers UnicodeEncodeError, raised on lone surrogates such as the
+    # surrogateescape'd bytes in paths and os.environ values.
+    return JsonEncoder(
+        "msgspec", dumps, (msgspec.EncodeError, TypeError, OverflowError, ValueError)
+    )
+
+
+def check_backend(backend: str) -> None:
+    """Raise ValueError if `backend` is unknown or not installed, without importing it."""
+    if backend in ("auto", "json"):
+        return
+    if backend not in JSON_BACKENDS:
+        raise ValueError(
+            f"unknown JSON backend {backend!r} (expected auto, {', '.join(JSON_BACKENDS)})"
+        )
+    import importlib.util
+
+    if importlib.util.find_spec(backend) is None:
+        raise ValueError(f"JSON backend {backend!r} is not installed")
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(backend: str = "auto") -> JsonEncoder:
+    """Return the encoder for `backend` ("auto" picks the first installed of JSON_BACKENDS).
+
+    Raises ValueError for unknown backends or ones that are not installed.
+    """
+    factories = {"orjson": _orjson_encoder, "msgspec": _msgspec_encoder}
+    if backend == "json":
+        return JsonEncoder("json", _stdlib_dumps)
+    if backend == "auto":
+        for name in JSON_BACKENDS[:-1]:
+            try:
+                return factories[name]()
+            except ImportError:
+                continue
+        return JsonEncoder("json", _stdlib_dumps)
+    check_backend(backend)
+    try:
+        return factories[backend]()
+    except ImportError as exc:
+        raise ValueError(f"JSON backend {backend!r} is not installed") from exc
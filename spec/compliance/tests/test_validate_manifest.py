@@ -1,12 +1,28 @@
 """Tests for validate_manifest.py — the compliance gatekeeper."""
 
 import json
+import shutil
 import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to sys.path so we can import validate_manifest
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-from validate_manifest import check_filesystem, load_schema, validate_file  # noqa: E402
+from validate_manifest import (  # noqa: E402
+    BundleWatcher,
+    ValidationStats,
+    check_filesystem,
+    check_manifest,
+    iter_targets,
+    load_schema,
+    main,
+    validate_file,
+    watch,
+)
 
 GOLDEN_DIR = Path(__file__).resolve().parent.parent / "golden"
 
@@ -155,6 +171,12 @@ class TestCheckFilesystemUnit:
         # attachments/ dir not created → should fail
         assert check_filesystem(path, manifest) is False
 
+    def test_redactions_field_accepted(self, validator, tmp_path):
+        manifest = self._minimal_manifest(bundle_dir_name=tmp_path.name)
+        manifest["meta"]["redactions"] = ["/context/password", "attachments/env.txt"]
+        path = self._make_bundle(tmp_path, manifest)
+        assert validate_file(path, validator) is True
+
     def test_declared_attachments_dir_exists_passes(self, tmp_path):
         manifest = self._minimal_manifest(
             bundle_dir_name=tmp_path.name, attachmentsDir="attachments/"
@@ -164,6 +186,12 @@ class TestCheckFilesystemUnit:
         (tmp_path / "attachments" / "file.txt").write_text("data", encoding="utf-8")
         assert check_filesystem(path, manifest) is True
 
+    def test_nested_extra_file_rejected(self, tmp_path):
+        manifest = self._minimal_manifest(bundle_dir_name=tmp_path.name)
+        path = self._make_bundle(tmp_path, manifest, extra_dirs=["sub/deeper"])
+        (tmp_path / "sub" / "deeper" / "rogue.txt").write_text("x", encoding="utf-8")
+        assert check_filesystem(path, manifest) is False
+
 
 # ---------------------------------------------------------------------------
 # Schema validation — missing required fields
@@ -246,3 +274,173 @@ class TestSchemaValidation:
         (tmp_path / "context.log").write_text("log\n", encoding="utf-8")
         result = validate_file(manifest_path, validator)
         assert result is False
+
+
+# ---------------------------------------------------------------------------
+# Discovery and CLI
+# ---------------------------------------------------------------------------
+def _bundle(root, name, manifest=True):
+    bundle = root / name
+    (bundle / "attachments" / "nested").mkdir(parents=True)
+    # A stray manifest inside an attachment subtree must not be discovered.
+    (bundle / "attachments" / "nested" / "manifest.json").write_text("{}", encoding="utf-8")
+    if manifest:
+        (bundle / "manifest.json").write_text("{}", encoding="utf-8")
+    return bundle
+
+
+class TestIterTargets:
+    def test_bundles_are_not_descended_into(self, tmp_path):
+        a = _bundle(tmp_path / "run1", "abcdef0123456789_20260101T000000Z")
+        b = _bundle(tmp_path / "archive" / "run2", "legacy-bundle")
+        missing = _bundle(tmp_path / "run1", "0123456789abcdef_20260101T000000Z", manifest=False)
+        found = sorted(iter_targets([str(tmp_path)]))
+        assert found == sorted(p / "manifest.json" for p in (a, b, missing))
+
+    def test_bundle_dir_and_file_arguments(self, tmp_path):
+        bundle = _bundle(tmp_path, "abcdef0123456789_20260101T000000Z")
+        manifest = bundle / "manifest.json"
+        assert list(iter_targets([str(bundle), str(manifest)])) == [manifest, manifest]
+
+    def test_golden_tree_matches_rglob(self):
+        assert sorted(iter_targets([str(GOLDEN_DIR)])) == sorted(GOLDEN_DIR.rglob("manifest.json"))
+
+
+class TestMain:
+    def test_stats_summary(self, capsys):
+        bundle = GOLDEN_DIR / "9f2a0c1b3d4e5a6b_20260202T143000Z"
+        assert main(["--stats", str(bundle)]) == 0
+        assert "summary: 1 bundles (1 ok, 0 invalid)" in capsys.readouterr().err
+
+    def test_invalid_tree_exit_code(self, capsys):
+        assert main([str(GOLDEN_DIR)]) == 1
+
+    def test_stats_counters(self, validator):
+        stats = ValidationStats()
+        manifest = GOLDEN_DIR / "9f2a0c1b3d4e5a6b_20260202T143000Z" / "manifest.json"
+        stats.add(check_manifest(manifest, validator))
+        stats.add(check_manifest(GOLDEN_DIR / "invalid_extra_file" / "manifest.json", validator))
+        assert (stats.bundles, stats.valid, stats.invalid) == (2, 1, 1)
+        assert stats.manifest_bytes > manifest.stat().st_size
+        assert stats.to_dict()["phaseMs"]["schema"] > 0
+
+
+class TestStructuredOutput:
+    def test_check_manifest_collects_pointers_and_timings(self, validator):
+        result = check_manifest(GOLDEN_DIR / "invalid_path_traversal" / "manifest.json", validator)
+        assert result.ok is False
+        assert [(i.phase, i.pointer) for i in result.errors] == [("schema", "/artifacts/logs")]
+        assert set(result.timings) == {"parse", "schema"}
+
+    def test_filesystem_error_record(self, validator):
+        result = check_manifest(GOLDEN_DIR / "invalid_extra_file" / "manifest.json", validator)
+        record = result.to_dict()
+        assert record["verdict"] == "invalid"
+        assert record["errors"][0]["phase"] == "fs"
+        assert "rogue.txt" in record["errors"][0]["message"]
+        assert set(record["timingsMs"]) == {"parse", "schema", "fs"}
+
+    def test_jsonl(self, capsys):
+        assert main(["--format", "jsonl", str(GOLDEN_DIR)]) == 1
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        bundles, summary = records[:-1], records[-1]
+        assert len(bundles) == 5
+        assert sum(r["verdict"] == "valid" for r in bundles) == 1
+        assert summary["type"] == "summary"
+        assert (summary["bundles"], summary["valid"], summary["invalid"]) == (5, 1, 4)
+        assert "bundlesPerSec" in summary
+
+    def test_junit_to_file(self, tmp_path):
+        report = tmp_path / "report.xml"
+        assert main(["--format", "junit", "--output", str(report), str(GOLDEN_DIR)]) == 1
+        suite = ET.parse(report).getroot().find("testsuite")
+        assert (suite.get("tests"), suite.get("failures")) == ("5", "4")
+        assert len(suite.findall("testcase/failure")) == 4
+
+
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+GOLDEN_BUNDLE = GOLDEN_DIR / "9f2a0c1b3d4e5a6b_20260202T143000Z"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBundleWatcher:
+    def test_manifest_must_settle(self, tmp_path):
+        clock = FakeClock()
+        watcher = BundleWatcher(tmp_path, settle=1.0, clock=clock)
+        bundle = tmp_path / "run" / "abcdef0123456789_20260101T000000Z"
+        bundle.mkdir(parents=True)
+        assert watcher.poll() == []
+        (bundle / "manifest.json").write_text("{", encoding="utf-8")
+        clock.now = 0.5
+        assert watcher.poll() == []
+        # Still being written: the settle window restarts.
+        (bundle / "manifest.json").write_text("{}", encoding="utf-8")
+        clock.now = 1.2
+        assert watcher.poll() == []
+        clock.now = 2.5
+        assert watcher.poll() == [bundle / "manifest.json"]
+        clock.now = 5.0
+        assert watcher.poll() == []
+
+    def test_plain_dir_becomes_bundle(self, tmp_path):
+        clock = FakeClock()
+        watcher = BundleWatcher(tmp_path, settle=0.0, clock=clock)
+        bundle = tmp_path / "legacy-bundle"
+        bundle.mkdir()
+        assert watcher.poll() == []
+        (bundle / "manifest.json").write_text("{}", encoding="utf-8")
+        assert watcher.poll() == [bundle / "manifest.json"]
+        assert watcher.poll() == []
+
+    def test_drain_returns_incomplete_bundles(self, tmp_path):
+        watcher = BundleWatcher(tmp_path, settle=60.0)
+        (tmp_path / "abcdef0123456789_20260101T000000Z").mkdir()
+        assert watcher.poll() == []
+        assert watcher.drain() == [tmp_path / "abcdef0123456789_20260101T000000Z" / "manifest.json"]
+
+
+class TestWatch:
+    def test_sentinel_ends_watch_with_verdict(self, tmp_path, capsys):
+        shutil.copytree(GOLDEN_BUNDLE, tmp_path / GOLDEN_BUNDLE.name)
+        (tmp_path / "DONE").write_text("", encoding="utf-8")
+        assert main(["--watch", str(tmp_path), "--sentinel", "DONE", "--format", "jsonl"]) == 0
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [r["verdict"] for r in records[:-1]] == ["valid"]
+        assert records[-1]["bundles"] == 1
+
+    def test_bundles_written_while_watching(self, tmp_path, validator):
+        results = []
+
+        def writer():
+            time.sleep(0.1)
+            shutil.copytree(GOLDEN_BUNDLE, tmp_path / "run" / GOLDEN_BUNDLE.name)
+            broken = tmp_path / "run" / "0123456789abcdef_20260101T000000Z"
+            broken.mkdir()
+            (broken / "manifest.json").write_text('{"schemaVersion": ', encoding="utf-8")
+            time.sleep(0.3)
+            (tmp_path / "DONE").write_text("", encoding="utf-8")
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        watch(tmp_path, validator, results.append, 0.02, 0.05, tmp_path / "DONE")
+        thread.join()
+        verdicts = {
+            r.path.parent.name: (r.ok, r.errors[0].phase if r.errors else None) for r in results
+        }
+        assert verdicts == {
+            GOLDEN_BUNDLE.name: (True, None),
+            "0123456789abcdef_20260101T000000Z": (False, "parse"),
+        }
+
+    def test_watch_and_paths_are_exclusive(self, tmp_path):
+        with pytest.raises(SystemExit):
+            main(["--watch", str(tmp_path), str(tmp_path)])
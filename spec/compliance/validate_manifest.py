@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
+import argparse
 import json
+import os
 import re
+import signal
 import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape, quoteattr
 
 try:
     import jsonschema
@@ -20,23 +28,149 @@ def load_schema() -> dict:
         return json.load(f)
 
 
-def iter_targets(args):
+# Bundle directories are named {testId}_{timestamp}, see spec/bundle-layout.md.
+BUNDLE_DIR_RE = re.compile(r"^[0-9a-f]{8,32}_\d{8}T\d{6}Z$")
+
+
+def iter_targets(args: Iterable[str]) -> Iterator[Path]:
+    """Yield the manifest.json of every bundle under `args`, streaming.
+
+    A directory is a bundle if its name matches BUNDLE_DIR_RE or it holds a
+    manifest.json; bundles are never descended into, so attachment subtrees are
+    not walked. Other directories are searched with os.scandir. Entries are
+    yielded in directory order, and only pending non-bundle directories are kept.
+    """
     for arg in args:
         path = Path(arg)
-        if path.is_dir():
-            for m in path.rglob("manifest.json"):
-                yield m
-        else:
+        if not path.is_dir():
             yield path
+            continue
+        if _is_bundle_dir(path.name, str(path)):
+            yield path / "manifest.json"
+            continue
+        pending = [str(path)]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except OSError as exc:
+                print(f"WARNING: cannot scan {exc.filename} ({exc.strerror})", file=sys.stderr)
+                continue
+            with entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    if _is_bundle_dir(entry.name, entry.path):
+                        yield Path(entry.path) / "manifest.json"
+                    else:
+                        pending.append(entry.path)
 
 
-def check_filesystem(path: Path, instance: dict) -> bool:
+def _is_bundle_dir(name: str, path: str) -> bool:
+    return BUNDLE_DIR_RE.match(name) is not None or os.path.isfile(
+        os.path.join(path, "manifest.json")
+    )
+
+
+PHASES = ("parse", "schema", "fs")
+FORMATS = ("text", "jsonl", "junit")
+
+
+@dataclass
+class Issue:
+    """One validation error; `pointer` is a JSON Pointer into the manifest ("" = root)."""
+
+    phase: str
+    pointer: str
+    message: str
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"phase": self.phase, "pointer": self.pointer, "message": self.message}
+
+
+@dataclass
+class ValidationResult:
+    path: Path
+    errors: List[Issue] = field(default_factory=list)
+    # Seconds spent per phase; phases that did not run are absent.
+    timings: Dict[str, float] = field(default_factory=dict)
+    manifest_bytes: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "bundle",
+            "path": str(self.path),
+            "verdict": "valid" if self.ok else "invalid",
+            "errors": [issue.to_dict() for issue in self.errors],
+            "timingsMs": {phase: round(s * 1000, 3) for phase, s in self.timings.items()},
+        }
+
+
+@dataclass
+class ValidationStats:
+    """Running counters; memory use does not grow with the number of bundles."""
+
+    bundles: int = 0
+    valid: int = 0
+    invalid: int = 0
+    manifest_bytes: int = 0
+    phase_seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, result: ValidationResult) -> None:
+        self.bundles += 1
+        if result.ok:
+            self.valid += 1
+        else:
+            self.invalid += 1
+        self.manifest_bytes += result.manifest_bytes
+        for phase, seconds in result.timings.items():
+            self.phase_seconds[phase] += seconds
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        per_sec = 1 / elapsed if elapsed > 0 else 0.0
+        return {
+            "type": "summary",
+            "bundles": self.bundles,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "elapsedMs": round(elapsed * 1000, 3),
+            "bundlesPerSec": round(self.bundles * per_sec, 1),
+            "manifestMiBPerSec": round(self.manifest_bytes / 2**20 * per_sec, 3),
+            "phaseMs": {phase: round(s * 1000, 3) for phase, s in self.phase_seconds.items()},
+        }
+
+    def summary(self) -> str:
+        data = self.to_dict()
+        phases = ", ".join(f"{phase} {ms / 1000:.2f}s" for phase, ms in data["phaseMs"].items())
+        return (
+            f"{self.bundles} bundles ({self.valid} ok, {self.invalid} invalid)"
+            f" in {data['elapsedMs'] / 1000:.2f}s - {data['bundlesPerSec']:.1f} bundles/s,"
+            f" {data['manifestMiBPerSec']:.2f} MiB/s of manifests ({phases})"
+        )
+
+
+def _pointer(parts: Iterable[Any]) -> str:
+    return "".join("/" + str(p).replace("~", "~0").replace("/", "~1") for p in parts)
+
+
+def filesystem_errors(path: Path, instance: dict) -> List[Issue]:
     """
     Enforce strict bundle layout:
     1. Verify all artifact paths in manifest exist.
     2. Verify NO extra files exist in the bundle that are not in the manifest.
     3. Verify no absolute paths, path traversal (..), or Windows drive letters in values.
     4. Attachments logic: if attachmentsDir not in manifest, NO attachments/ dir allowed (even empty).
+
+    Returns the first violation found, or an empty list.
     """
     bundle_root = path.parent
     # Collect all expected relative paths from manifest
@@ -47,22 +181,23 @@ def check_filesystem(path: Path, instance: dict) -> bool:
 
     # Check for path safety and collect expectations
     for key, val in artifacts.items():
-        # Safety checks: Traversal, Absolute Linux, Absolute Windows (drive letter)
+        pointer = _pointer(("artifacts", key))
         # Safety checks: Traversal, Absolute Linux, Absolute Windows (drive letter), UNC
         # Drive letter regex: starts with char + colon + slash/backslash, OR starts with double backslash (UNC/Network)
         # We also check for simple absolute path "/" and traversal ".."
         if ".." in val or val.startswith("/") or re.match(r"^[a-zA-Z]:|^\\\\", val):
-            print(f"INVALID: {path} (unsafe path in artifacts: {key}={val})", file=sys.stderr)
-            return False
+            return [Issue("fs", pointer, f"unsafe path in artifacts: {key}={val}")]
 
         if key == "bundleDir":
             # Semantic check: bundleDir must match actual directory name
             if val and val != bundle_root.name:
-                print(
-                    f"INVALID: {path} (artifacts.bundleDir '{val}' != actual directory '{bundle_root.name}')",
-                    file=sys.stderr,
-                )
-                return False
+                return [
+                    Issue(
+                        "fs",
+                        pointer,
+                        f"artifacts.bundleDir '{val}' != actual directory '{bundle_root.name}'",
+                    )
+                ]
             continue
 
         if val.endswith("/"):
@@ -77,8 +212,7 @@ def check_filesystem(path: Path, instance: dict) -> bool:
             missing.append(f)
 
     if missing:
-        print(f"INVALID: {path} (missing files declared in manifest: {missing})", file=sys.stderr)
-        return False
+        return [Issue("fs", "/artifacts", f"missing files declared in manifest: {missing}")]
 
     # 2. Verify no extras (Strict Mode) + Attachments Logic
     extras = []
@@ -89,26 +223,27 @@ def check_filesystem(path: Path, instance: dict) -> bool:
 
     # 1. If declared, it MUST exist (Strict Spec consistency)
     if attachments_declared and not (bundle_root / "attachments").exists():
-        print(
-            f"INVALID: {path} ('attachmentsDir' declared but 'attachments/' directory missing)",
-            file=sys.stderr,
-        )
-        return False
+        return [
+            Issue(
+                "fs",
+                "/artifacts/attachmentsDir",
+                "'attachmentsDir' declared but 'attachments/' directory missing",
+            )
+        ]
 
     # 2. If present on disk, it MUST be declared
     if (bundle_root / "attachments").exists() and not attachments_declared:
-        print(
-            f"INVALID: {path} (found 'attachments/' directory but 'attachmentsDir' not in manifest)",
-            file=sys.stderr,
-        )
-        return False
-
-    # rglob/walk the bundle_root for FILES
-    for p in bundle_root.rglob("*"):
-        if not p.is_file():
-            continue
-        rel = p.relative_to(bundle_root).as_posix()
+        return [
+            Issue(
+                "fs",
+                "/artifacts",
+                "found 'attachments/' directory but 'attachmentsDir' not in manifest",
+            )
+        ]
 
+    # Walk the bundle_root for FILES; declared directories are covered as a whole
+    # (e.g. everything under "attachments/"), so they are not descended into.
+    for rel in _bundle_files(str(bundle_root), expected_dirs):
         # Check if explicitly expected
         if rel in expected_files:
             continue
@@ -126,47 +261,377 @@ def check_filesystem(path: Path, instance: dict) -> bool:
         extras.append(rel)
 
     if extras:
-        print(f"INVALID: {path} (contain extra files not in manifest: {extras})", file=sys.stderr)
-        return False
+        return [Issue("fs", "/artifacts", f"contain extra files not in manifest: {extras}")]
 
-    return True
+    return []
 
 
-def validate_file(path: Path, validator) -> bool:
-    if not path.exists():
-        print(f"INVALID: {path} (not found)", file=sys.stderr)
-        return False
+def check_filesystem(path: Path, instance: dict) -> bool:
+    """Apply the filesystem rules of `filesystem_errors`, printing any violation."""
+    result = ValidationResult(path, filesystem_errors(path, instance))
+    if not result.ok:
+        TextReporter(sys.stdout).add(result)
+    return result.ok
+
+
+def _bundle_files(root: str, skip_dirs: Set[str], prefix: str = "") -> Iterator[str]:
+    """Yield bundle-relative POSIX paths of files, skipping the `skip_dirs` subtrees."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            rel = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if rel + "/" not in skip_dirs:
+                    yield from _bundle_files(entry.path, skip_dirs, rel + "/")
+            elif entry.is_file():
+                yield rel
+
+
+def check_manifest(path: Path, validator) -> ValidationResult:
+    """Validate one manifest, collecting errors and per-phase timings without printing."""
+    result = ValidationResult(path)
+    clock = time.perf_counter
+    start = clock()
     try:
-        instance = json.loads(path.read_text(encoding="utf-8"))
+        with path.open("rb") as f:
+            instance = json.load(f)
+            result.manifest_bytes = f.tell()
+    except FileNotFoundError:
+        result.errors.append(Issue("parse", "", "not found"))
     except Exception as exc:
-        print(f"INVALID: {path} (invalid JSON: {exc})", file=sys.stderr)
-        return False
+        result.errors.append(Issue("parse", "", f"invalid JSON: {exc}"))
+    result.timings["parse"] = clock() - start
+    if result.errors:
+        return result
+
+    start = clock()
     errors = sorted(validator.iter_errors(instance), key=lambda e: list(e.path))
-    if errors:
-        print(f"INVALID: {path}", file=sys.stderr)
-        for err in errors:
-            loc = "/".join(str(p) for p in err.path) or "<root>"
-            print(f"  - {loc}: {err.message}", file=sys.stderr)
-        return False
+    result.errors = [Issue("schema", _pointer(err.path), err.message) for err in errors]
+    result.timings["schema"] = clock() - start
+    if result.errors:
+        return result
 
     # Schema checks passed, now check strict filesystem hygiene
-    if not check_filesystem(path, instance):
-        return False
+    start = clock()
+    result.errors = filesystem_errors(path, instance)
+    result.timings["fs"] = clock() - start
+    return result
+
+
+def validate_file(path: Path, validator) -> bool:
+    result = check_manifest(path, validator)
+    TextReporter(sys.stdout).add(result)
+    return result.ok
+
+
+# ---------------------------------------------------------------------------
+# Reporters: add() is called once per bundle, close() once with the totals.
+# ---------------------------------------------------------------------------
+class TextReporter:
+    """The historical format: OK lines on `out`, INVALID lines on stderr (or `out` if a file)."""
+
+    def __init__(self, out: IO[str]) -> None:
+        self.out = out
+        self.err = sys.stderr if out is sys.stdout else out
+
+    def add(self, result: ValidationResult) -> None:
+        if result.ok:
+            print(f"OK: {result.path}", file=self.out)
+        elif result.errors[0].phase == "schema":
+            print(f"INVALID: {result.path}", file=self.err)
+            for issue in result.errors:
+                loc = issue.pointer[1:].replace("~1", "/").replace("~0", "~") or "<root>"
+                print(f"  - {loc}: {issue.message}", file=self.err)
+        else:
+            for issue in result.errors:
+                print(f"INVALID: {result.path} ({issue.message})", file=self.err)
+
+    def close(self, stats: ValidationStats) -> None:
+        self.out.flush()
 
-    print(f"OK: {path}")
-    return True
 
+class JsonlReporter:
+    """One JSON object per bundle, then a final {"type": "summary"} record."""
+
+    def __init__(self, out: IO[str]) -> None:
+        self.out = out
+
+    def add(self, result: ValidationResult) -> None:
+        self.out.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+        self.out.flush()
+
+    def close(self, stats: ValidationStats) -> None:
+        self.out.write(json.dumps(stats.to_dict()) + "\n")
+        self.out.flush()
+
+
+class JUnitReporter:
+    """JUnit XML with one <testcase> per bundle.
+
+    The <testsuite> totals come first in the document, so test cases are spooled
+    to a temporary file and copied after it rather than held in memory.
+    """
+
+    def __init__(self, out: IO[str]) -> None:
+        self.out = out
+        self.spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def add(self, result: ValidationResult) -> None:
+        seconds = sum(result.timings.values())
+        self.spool.write(
+            f'    <testcase classname="blackbox.bundle" name={quoteattr(str(result.path))}'
+            f' time="{seconds:.6f}"'
+        )
+        if result.ok:
+            self.spool.write(" />\n")
+            return
+        details = "\n".join(f"[{i.phase}] {i.pointer or '/'}: {i.message}" for i in result.errors)
+        self.spool.write(
+            f">\n      <failure message={quoteattr(result.errors[0].message)}"
+            f' type="{result.errors[0].phase}">{escape(details)}</failure>\n'
+            "    </testcase>\n"
+        )
+
+    def close(self, stats: ValidationStats) -> None:
+        summary = stats.to_dict()
+        self.out.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+        self.out.write(
+            f'  <testsuite name="blackbox-manifest" tests="{stats.bundles}"'
+            f' failures="{stats.invalid}" errors="0" time="{stats.elapsed:.6f}">\n'
+            "    <properties>\n"
+        )
+        for key in ("bundlesPerSec", "manifestMiBPerSec"):
+            self.out.write(f'      <property name="{key}" value="{summary[key]}" />\n')
+        for phase, ms in summary["phaseMs"].items():
+            self.out.write(f'      <property name="phaseMs.{phase}" value="{ms}" />\n')
+        self.out.write("    </properties>\n")
+        self.spool.seek(0)
+        for line in self.spool:
+            self.out.write(line)
+        self.spool.close()
+        self.out.write("  </testsuite>\n</testsuites>\n")
+        self.out.flush()
+
+
+REPORTERS = {"text": TextReporter, "jsonl": JsonlReporter, "junit": JUnitReporter}
+
+
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+# Directory listings whose mtime is this recent are not cached: on filesystems
+# with coarse timestamps an entry created in the same tick would be missed.
+_MTIME_SLACK_NS = 2 * 10**9
+
+
+class BundleWatcher:
+    """Poll an output root for bundles and hand out each manifest once it is complete.
+
+    Stdlib only (inotify is not in the standard library): every poll stats the
+    directories under `root` and re-lists only those whose mtime changed. A
+    manifest is ready once its size and mtime have not changed for `settle`
+    seconds, which also debounces bursts of writes; adapters write manifest.json
+    last, after context.log and attachments.
+    """
+
+    def __init__(
+        self, root: Path, settle: float = 1.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.root = str(root)
+        self.settle = settle
+        self.clock = clock
+        # Plain (non-bundle) directory -> (mtime_ns, plain subdirectories).
+        self._dirs: Dict[str, Tuple[int, List[str]]] = {}
+        # Bundle directory -> (manifest (size, mtime_ns) or None, unchanged since).
+        self._pending: Dict[str, Tuple[Optional[Tuple[int, int]], float]] = {}
+        # Bundle directories already pending or handed out.
+        self._seen: Set[str] = set()
+
+    def poll(self) -> List[Path]:
+        """Scan for new bundles and return the manifests that became ready."""
+        self._scan(self.root, is_root=True)
+        now = self.clock()
+        ready = []
+        for bundle, (signature, since) in list(self._pending.items()):
+            manifest = os.path.join(bundle, "manifest.json")
+            current = _signature(manifest)
+            if current is None or current != signature:
+                self._pending[bundle] = (current, now)
+            elif now - since >= self.settle:
+                del self._pending[bundle]
+                ready.append(Path(manifest))
+        return ready
+
+    def defer(self, manifest: Path) -> None:
+        """Put a manifest back (e.g. it did not parse yet) and restart its settle window."""
+        self._pending[str(manifest.parent)] = (_signature(str(manifest)), self.clock())
+
+    def drain(self) -> List[Path]:
+        """Final sweep: return every pending manifest, complete or not."""
+        self._scan(self.root, is_root=True)
+        ready = [Path(bundle) / "manifest.json" for bundle in self._pending]
+        self._pending.clear()
+        return ready
+
+    def _scan(self, path: str, is_root: bool = False) -> None:
+        if path in self._seen:
+            return
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._dirs.pop(path, None)
+            return
+        cached = self._dirs.get(path)
+        if cached is not None and cached[0] == mtime:
+            children = cached[1]
+        else:
+            if not is_root and os.path.isfile(os.path.join(path, "manifest.json")):
+                # A plain directory that received a manifest turned out to be a bundle.
+                self._dirs.pop(path, None)
+                self._add_bundle(path)
+                return
+            children = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if not entry.is_dir(follow_symlinks=False) or entry.path in self._seen:
+                            continue
+                        if _is_bundle_dir(entry.name, entry.path):
+                            self._add_bundle(entry.path)
+                        else:
+                            children.append(entry.path)
+            except OSError:
+                return
+            recent = time.time_ns() - mtime < _MTIME_SLACK_NS
+            self._dirs[path] = (-1 if recent else mtime, children)
+        for child in children:
+            self._scan(child)
+
+    def _add_bundle(self, path: str) -> None:
+        self._seen.add(path)
+        self._pending[path] = (_signature(os.path.join(path, "manifest.json")), self.clock())
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+def watch(
+    root: Path,
+    validator,
+    on_result: Callable[[ValidationResult], None],
+    interval: float = 0.5,
+    settle: float = 1.0,
+    sentinel: Optional[Path] = None,
+) -> None:
+    """Validate bundles under `root` as they appear until SIGINT/SIGTERM or `sentinel` exists.
+
+    Manifests that do not parse yet are retried until shutdown; the final sweep
+    validates everything still pending, so incomplete bundles are reported invalid.
+    """
+    watcher = BundleWatcher(root, settle)
+    stop: List[int] = []
+
+    def request_stop(signum, frame) -> None:
+        stop.append(signum)
+
+    previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        while not stop and not (sentinel is not None and sentinel.exists()):
+            for manifest in watcher.poll():
+                result = check_manifest(manifest, validator)
+                if result.errors and result.errors[0].phase == "parse":
+                    watcher.defer(manifest)
+                else:
+                    on_result(result)
+            time.sleep(interval)
+        for manifest in watcher.drain():
+            on_result(check_manifest(manifest, validator))
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Validate BlackBox bundles against the manifest schema and layout rules."
+    )
+    parser.add_argument(
+        "paths", nargs="*", metavar="PATH", help="manifest.json, bundle dir or output root"
+    )
+    parser.add_argument(
+        "--watch",
+        metavar="DIR",
+        help="validate bundles under DIR as they are written, until SIGINT/SIGTERM or --sentinel",
+    )
+    parser.add_argument(
+        "--sentinel",
+        metavar="FILE",
+        help="with --watch: finish once FILE exists (relative paths are under DIR)",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=0.5, help="with --watch: seconds between polls"
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=1.0,
+        help="with --watch: seconds a manifest must stay unchanged before it is validated",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="text (default), jsonl (one record per bundle plus a summary) or junit (XML)",
+    )
+    parser.add_argument("--output", "-o", help="write the report to this file (default: stdout)")
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="report progress and throughput on stderr about once per second",
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print a throughput summary on stderr when done"
+    )
+    args = parser.parse_args(argv)
+    if bool(args.watch) == bool(args.paths):
+        parser.error("give either PATH arguments or --watch DIR")
 
-def main() -> int:
-    if len(sys.argv) < 2:
-        print("Usage: validate_manifest.py <manifest.json|dir> [more paths...]", file=sys.stderr)
-        return 2
     schema = load_schema()
     validator = jsonschema.Draft202012Validator(schema, format_checker=jsonschema.FormatChecker())
-    ok = True
-    for target in iter_targets(sys.argv[1:]):
-        ok = validate_file(target, validator) and ok
-    return 0 if ok else 1
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        reporter = REPORTERS[args.format](out)
+        stats = ValidationStats()
+        next_report = stats.started + 1.0
+
+        def emit(result: ValidationResult) -> None:
+            nonlocal next_report
+            stats.add(result)
+            reporter.add(result)
+            if args.progress and time.monotonic() >= next_report:
+                print(f"progress: {stats.summary()}", file=sys.stderr)
+                next_report = time.monotonic() + 1.0
+            if args.watch:
+                out.flush()
+
+        if args.watch:
+            root = Path(args.watch)
+            sentinel = root / args.sentinel if args.sentinel else None
+            watch(root, validator, emit, args.interval, args.settle, sentinel)
+        else:
+            for target in iter_targets(args.paths):
+                emit(check_manifest(target, validator))
+        reporter.close(stats)
+        if args.progress or args.stats:
+            print(f"summary: {stats.summary()}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0 if stats.invalid == 0 else 1
 
 
 if __name__ == "__main__":
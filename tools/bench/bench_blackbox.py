@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""Reproducible benchmarks for the pytest adapter and the manifest validator.
+
+Results are emitted as JSON so they can be tracked across commits:
+
+    python3 tools/bench/bench_blackbox.py --output bench.json
+    python3 tools/bench/bench_blackbox.py --quick --only to_json_value,write_bundle
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ADAPTER_SRC = ROOT_DIR / "adapters" / "python-pytest" / "src"
+COMPLIANCE_DIR = ROOT_DIR / "spec" / "compliance"
+
+sys.path.insert(0, str(ADAPTER_SRC))
+sys.path.insert(0, str(COMPLIANCE_DIR))
+
+from pytest_blackbox import plugin  # noqa: E402
+
+BENCHMARKS: Dict[str, Callable[["Runner"], None]] = {}
+
+
+def benchmark(name: str):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+class Runner:
+    def __init__(self, quick: bool) -> None:
+        self.quick = quick
+        self.results: List[Dict[str, Any]] = []
+
+    def scale(self, full: int, quick: int) -> int:
+        return quick if self.quick else full
+
+    def timeit(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        number: int,
+        repeat: int = 5,
+        params: Optional[Dict[str, Any]] = None,
+        setup: Optional[Callable[[], Any]] = None,
+    ) -> Dict[str, Any]:
+        """Time `number` calls of `fn`, `repeat` times, and record per-call statistics."""
+        fn()  # warm-up
+        samples = []
+        for _ in range(self.scale(repeat, min(repeat, 3))):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - start) / number)
+        return self.record(name, samples, params=params, number=number)
+
+    def record(
+        self,
+        name: str,
+        samples: List[float],
+        params: Optional[Dict[str, Any]] = None,
+        number: int = 1,
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        best = min(samples)
+        result = {
+            "name": name,
+            "params": params or {},
+            "number": number,
+            "repeat": len(samples),
+            "minSec": best,
+            "medianSec": statistics.median(samples),
+            "meanSec": statistics.fmean(samples),
+            "opsPerSec": (1.0 / best) if best > 0 else None,
+        }
+        result.update(extra)
+        self.results.append(result)
+        label = f"{name} {params}" if params else name
+        print(f"  {label}: {best * 1e6:.2f} us/op (median {result['medianSec'] * 1e6:.2f})")
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+def fake_item(index: int = 0, params: Optional[Dict[str, Any]] = None):
+    item = SimpleNamespace(
+        nodeid=f"tests/test_generated.py::test_case_{index}",
+        name=f"test_case_{index}",
+        originalname=f"test_case_{index}",
+    )
+    if params is not None:
+        item.callspec = SimpleNamespace(params=params)
+    return item
+
+
+def fake_failure():
+    excinfo = SimpleNamespace(type=AssertionError, value=AssertionError("assert 1 == 2"))
+    report = SimpleNamespace(
+        longreprtext="def test_case():\n>       assert 1 == 2\nE       assert 1 == 2\n"
+    )
+    return excinfo, report
+
+
+def nested_payload(width: int, depth: int) -> Any:
+    if depth == 0:
+        return {"id": 1, "name": "alice", "score": 1.5, "active": True, "tags": ["a", "b"]}
+    return {f"k{i}": nested_payload(width, depth - 1) for i in range(width)}
+
+
+@contextlib.contextmanager
+def output_dir(path: Path):
+    previous = os.environ.get("BLACKBOX_OUTPUT_DIR")
+    os.environ["BLACKBOX_OUTPUT_DIR"] = str(path)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("BLACKBOX_OUTPUT_DIR", None)
+        else:
+            os.environ["BLACKBOX_OUTPUT_DIR"] = previous
+
+
+# ---------------------------------------------------------------------------
+# Adapter benchmarks
+# ---------------------------------------------------------------------------
+def legacy_to_json_value(value: Any) -> Any:
+    """The naive recursive converter used before the dispatch-based rewrite (baseline)."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [legacy_to_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): legacy_to_json_value(v) for k, v in value.items()}
+    return str(value)
+
+
+@dataclass
+class SampleRecord:
+    id: int
+    name: str
+    created: datetime
+    tags: List[str]
+
+
+@benchmark("to_json_value")
+def bench_to_json_value(runner: Runner) -> None:
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cases = {
+        "scalar": "hello",
+        "flat_dict": {f"key{i}": i for i in range(20)},
+        "flat_list": list(range(200)),
+        "nested": nested_payload(width=4, depth=3),
+        "unknown_objects": [object() for _ in range(20)],
+        "dataclasses": [SampleRecord(i, f"user{i}", created, ["a", "b"]) for i in range(20)],
+    }
+    impls = {"current": plugin.to_json_value, "legacy": legacy_to_json_value}
+    for case, value in cases.items():
+        for impl, fn in impls.items():
+            runner.timeit(
+                "to_json_value",
+                lambda fn=fn, value=value: fn(value),
+                number=runner.scale(2000, 200),
+                params={"case": case, "impl": impl},
+            )
+
+
+@benchmark("recorder")
+def bench_recorder(runner: Runner) -> None:
+    number = runner.scale(20000, 2000)
+    state = plugin.create_state(fake_item())
+    recorder = plugin.BlackBoxRecorder(state)
+
+    def reset():
+        state.context.clear()
+        state.steps.clear()
+
+    runner.timeit("recorder.log", lambda: recorder.log("user", "alice"), number=number, setup=reset)
+    runner.timeit("recorder.step", lambda: recorder.step("start"), number=number, setup=reset)
+    payload = {"user": "alice", "items": [1, 2, 3]}
+    runner.timeit(
+        "recorder.step",
+        lambda: recorder.step("checkout", "DEBUG", data=payload),
+        number=number,
+        params={"data": True},
+        setup=reset,
+    )
+
+
+@benchmark("create_state")
+def bench_create_state(runner: Runner) -> None:
+    number = runner.scale(20000, 2000)
+    plain = fake_item(7)
+    parametrized = fake_item(7, params={"user": "alice", "count": 3})
+    runner.timeit("create_state", lambda: plugin.create_state(plain), number=number)
+    runner.timeit(
+        "create_state",
+        lambda: plugin.create_state(parametrized),
+        number=number,
+        params={"parametrized": True},
+    )
+
+
+@benchmark("environment")
+def bench_environment(runner: Runner) -> None:
+    """One-off session cost of probing runtime, git and CI metadata."""
+    from pytest_blackbox.environment import probe_environment
+
+    runner.timeit(
+        "environment.probe",
+        lambda: probe_environment(ROOT_DIR),
+        number=runner.scale(200, 20),
+    )
+
+
+@benchmark("json_encoder")
+def bench_json_encoder(runner: Runner) -> None:
+    from pytest_blackbox.serialize import JSON_BACKENDS, get_encoder
+
+    manifest = {
+        "context": {f"key{i}": nested_payload(width=3, depth=2) for i in range(50)},
+        "steps": [
+            {"ts": "2026-01-01T00:00:00Z", "level": "INFO", "message": f"step {i}", "data": i}
+            for i in range(500)
+        ],
+    }
+    for backend in JSON_BACKENDS:
+        try:
+            encoder = get_encoder(backend)
+        except ValueError:
+            print(f"  skipped: {backend} is not installed")
+            continue
+        for compact in (False, True):
+            result = runner.timeit(
+                "json_encoder",
+                lambda encoder=encoder, compact=compact: encoder.dumps(manifest, compact),
+                number=runner.scale(200, 20),
+                params={"backend": backend, "compact": compact},
+            )
+            result["bytes"] = len(encoder.dumps(manifest, compact))
+
+
+@benchmark("write_bundle")
+def bench_write_bundle(runner: Runner) -> None:
+    sizes = [0, 1024, 64 * 1024, 1024 * 1024]
+    counts = [0, 1, 10, 50]
+    if runner.quick:
+        sizes, counts = [0, 64 * 1024], [0, 10]
+    number = runner.scale(20, 5)
+    excinfo, report = fake_failure()
+    for count in counts:
+        for size in sizes:
+            if count == 0 and size != sizes[0]:
+                continue
+            content = "x" * size
+            with tempfile.TemporaryDirectory() as tmp, output_dir(Path(tmp)):
+                counter = iter(range(10**9))
+
+                def write_one():
+                    state = plugin.create_state(fake_item(next(counter)))
+                    state.context.update({"user": "alice", "attempt": 3})
+                    state.steps.append(
+                        {"ts": "2026-01-01T00:00:00Z", "level": "INFO", "message": "start"}
+                    )
+                    for i in range(count):
+                        state.attachments.append((f"file{i}.txt", content))
+                    plugin.write_bundle(state, excinfo, report)
+
+                runner.timeit(
+                    "write_bundle",
+                    write_one,
+                    number=number,
+                    repeat=3,
+                    params={"attachments": count, "attachmentBytes": size if count else 0},
+                )
+
+
+@benchmark("redact")
+def bench_redact(runner: Runner) -> None:
+    from pytest_blackbox.redact import Redactor
+
+    redactor = Redactor()
+    mib = runner.scale(8, 2)
+    line = "2026-01-01T00:00:00Z INFO request id=42 path=/api/v1/items status=200\n"
+    secret = "2026-01-01T00:00:00Z DEBUG Authorization: Bearer eyJhbGciOi.abc.def\n"
+    lines = mib * 1024 * 1024 // len(line)
+    text = "".join(secret if i % 1000 == 0 else line for i in range(lines))
+    size = len(text.encode("utf-8"))
+
+    samples = []
+    for _ in range(runner.scale(5, 2)):
+        start = time.perf_counter()
+        redactor.redact_text(text)
+        samples.append(time.perf_counter() - start)
+    runner.record(
+        "redact.text", samples, params={"bytes": size}, mibPerSec=size / min(samples) / 2**20
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = Path(tmp) / "in.log", Path(tmp) / "out.log"
+        src.write_text(text, encoding="utf-8")
+        samples = []
+        for _ in range(runner.scale(5, 2)):
+            start = time.perf_counter()
+            redactor.copy_file(src, dst)
+            samples.append(time.perf_counter() - start)
+        runner.record(
+            "redact.file", samples, params={"bytes": size}, mibPerSec=size / min(samples) / 2**20
+        )
+
+    payload = {"users": [nested_payload(width=4, depth=3) for _ in range(runner.scale(20, 5))]}
+    payload["users"][0]["password"] = "hunter2"
+    runner.timeit(
+        "redact.value",
+        lambda: redactor.redact_value(payload, "/context", []),
+        number=runner.scale(50, 10),
+        params={"leaves": len(payload["users"]) * 64},
+    )
+
+
+@benchmark("suite_overhead")
+def bench_suite_overhead(runner: Runner) -> None:
+    """Wall-clock cost of the plugin on a generated suite of passing tests."""
+    tests = runner.scale(10000, 1000)
+    plugin_args = ["-p", "pytest_blackbox.plugin"]
+    modes = {
+        "disabled": ([], {}),
+        "default": (plugin_args, {}),
+        "autouse": ([*plugin_args, "--blackbox-autouse"], {}),
+        "inert": (plugin_args, {"BLACKBOX_INERT": "1"}),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        suite = Path(tmp) / "test_generated.py"
+        suite.write_text(
+            "import pytest\n\n\n"
+            f"@pytest.mark.parametrize('i', range({tests}))\n"
+            "def test_generated(i):\n"
+            "    assert i >= 0\n",
+            encoding="utf-8",
+        )
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ADAPTER_SRC), env.get("PYTHONPATH")]))
+        env["BLACKBOX_OUTPUT_DIR"] = str(Path(tmp) / "blackbox-reports")
+        # Load the plugin explicitly so the result does not depend on what is pip-installed.
+        env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "1"
+        timings: Dict[str, float] = {}
+        for mode, (extra, mode_env) in modes.items():
+            cmd = [
+                sys.executable,
+                "-m",
+                "pytest",
+                "-q",
+                "-p",
+                "no:cacheprovider",
+                *extra,
+                str(suite),
+            ]
+            samples = []
+            for _ in range(runner.scale(3, 1)):
+                start = time.perf_counter()
+                subprocess.run(
+                    cmd, cwd=tmp, env={**env, **mode_env}, check=True, capture_output=True
+                )
+                samples.append(time.perf_counter() - start)
+            timings[mode] = min(samples)
+            runner.record(
+                "suite_overhead",
+                [s / tests for s in samples],
+                params={"mode": mode, "tests": tests},
+                totalSec=min(samples),
+            )
+        base = timings["disabled"]
+        for mode in ("default", "autouse", "inert"):
+            overhead = (timings[mode] - base) / tests
+            print(f"  per-test overhead ({mode}): {overhead * 1e6:.2f} us")
+            runner.results.append(
+                {
+                    "name": "suite_overhead.per_test",
+                    "params": {"mode": mode, "tests": tests},
+                    "overheadSec": overhead,
+                }
+            )
+
+
+@benchmark("plugin_import")
+def bench_plugin_import(runner: Runner) -> None:
+    """Cost of importing the plugin module in a fresh interpreter that already has pytest."""
+    code = (
+        "import time, pytest\n"
+        "start = time.perf_counter()\n"
+        "import pytest_blackbox.plugin\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ADAPTER_SRC), env.get("PYTHONPATH")]))
+    samples = []
+    for _ in range(runner.scale(10, 3)):
+        out = subprocess.run(
+            [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+        )
+        samples.append(float(out.stdout.strip()))
+    runner.record("plugin_import", samples)
+
+
+# ---------------------------------------------------------------------------
+# Validator benchmarks
+# ---------------------------------------------------------------------------
+def synthetic_tree(root: Path, bundles: int, attachments: int) -> None:
+    for i in range(bundles):
+        test_id = f"{i:016x}"
+        name = f"{test_id}_20260101T000000Z"
+        bundle = root / name
+        bundle.mkdir(parents=True)
+        manifest = {
+            "schemaVersion": 1,
+            "meta": {
+                "testId": test_id,
+                "testName": f"test_{i}",
+                "testClass": "tests/test_generated.py",
+                "status": "FAILED",
+                "timestamp": "2026-01-01T00:00:00Z",
+                "durationMs": 12,
+                "runId": "00000000-0000-0000-0000-000000000000",
+                "framework": {"name": "pytest", "version": "8.0.0"},
+                "runtime": {"language": "python", "version": "3.11.0", "os": "Linux"},
+            },
+            "context": {"user": "alice", "payload": nested_payload(width=3, depth=2)},
+            "steps": [
+                {"ts": "2026-01-01T00:00:00Z", "level": "INFO", "message": f"step {s}"}
+                for s in range(10)
+            ],
+            "exception": {"type": "AssertionError", "message": "assert 1 == 2"},
+            "artifacts": {"bundleDir": name, "logs": "context.log"},
+        }
+        if attachments:
+            manifest["artifacts"]["attachmentsDir"] = "attachments/"
+            (bundle / "attachments").mkdir()
+            for a in range(attachments):
+                (bundle / "attachments" / f"file{a}.txt").write_text("x", encoding="utf-8")
+        (bundle / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        (bundle / "context.log").write_text("BlackBox context log\n", encoding="utf-8")
+
+
+@benchmark("validator")
+def bench_validator(runner: Runner) -> None:
+    try:
+        import jsonschema
+        import validate_manifest
+    except ImportError:
+        print("  skipped: jsonschema is not installed")
+        return
+    schema = validate_manifest.load_schema()
+    validator = jsonschema.Draft202012Validator(schema, format_checker=jsonschema.FormatChecker())
+    bundles = runner.scale(500, 50)
+    for attachments in (0, 20):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            synthetic_tree(root, bundles, attachments)
+            params = {"bundles": bundles, "attachmentsPerBundle": attachments}
+
+            start = time.perf_counter()
+            targets = list(validate_manifest.iter_targets([str(root)]))
+            discovery = time.perf_counter() - start
+            runner.record("validator.discovery", [discovery], params=params)
+
+            samples = []
+            for _ in range(runner.scale(3, 1)):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for target in targets:
+                        if not validate_manifest.validate_file(target, validator):
+                            raise RuntimeError(f"synthetic bundle failed validation: {target}")
+                samples.append(time.perf_counter() - start)
+            runner.record(
+                "validator.validate",
+                [s / len(targets) for s in samples],
+                params=params,
+                bundlesPerSec=len(targets) / min(samples),
+            )
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+def git_sha() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", "-o", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for smoke runs")
+    parser.add_argument(
+        "--only",
+        help=f"comma-separated subset of benchmarks ({', '.join(BENCHMARKS)})",
+    )
+    args = parser.parse_args(argv)
+
+    selected = list(BENCHMARKS)
+    if args.only:
+        selected = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in BENCHMARKS]
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    runner = Runner(quick=args.quick)
+    log = sys.stderr if not args.output else sys.stdout
+    with contextlib.redirect_stdout(log):
+        for name in selected:
+            print(f"[bench] {name}")
+            BENCHMARKS[name](runner)
+
+    report = {
+        "meta": {
+            "gitSha": git_sha(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "os": platform.system(),
+            "arch": platform.machine(),
+            "quick": args.quick,
+        },
+        "results": runner.results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""Compare BlackBox bundles for the same test across runs.
+
+    bundle_diff.py OLD_BUNDLE NEW_BUNDLE
+    bundle_diff.py --baseline BASELINE_RUN_DIR CANDIDATE_RUN_DIR
+
+Exit status: 0 when nothing changed, 1 when differences were found, 2 on usage errors
+or when a bundle could not be read.
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # optional speed-up; the stdlib parser gives identical results
+    json_loads = json.loads
+
+BUNDLE_DIR_RE = re.compile(r"^([0-9a-f]{8,32})_(\d{8}T\d{6}Z)$")
+RUNTIME_KEYS = ("framework", "runtime")
+# Differ between any two CI runs, so they are reported but never make a pair "changed".
+RUN_IDENTITY_KEYS = ("gitSha", "ci", "env")
+
+CaseKey = Tuple[str, str]
+
+
+def manifest_path(path: Path) -> Path:
+    return path / "manifest.json" if path.is_dir() else path
+
+
+def load_manifest(path: Path) -> Dict[str, Any]:
+    """Read a manifest; ValueError if it is not JSON or has members of the wrong shape."""
+    with manifest_path(path).open("rb") as f:
+        manifest = json_loads(f.read())
+    check_shape(manifest)
+    return manifest
+
+
+def check_shape(manifest: Any) -> None:
+    """Check the members the diff reads, so a schema-invalid manifest fails on load."""
+
+    def expect(value: Any, kind: type, pointer: str, name: str) -> None:
+        if not isinstance(value, kind):
+            raise ValueError(f"{pointer or '/'} is not {name}")
+
+    expect(manifest, dict, "", "an object")
+    for key in ("meta", "context", "exception"):
+        if key in manifest:
+            expect(manifest[key], dict, f"/{key}", "an object")
+    if "parameters" in manifest.get("meta", {}):
+        expect(manifest["meta"]["parameters"], dict, "/meta/parameters", "an object")
+    if "steps" in manifest:
+        expect(manifest["steps"], list, "/steps", "an array")
+    for index, step in enumerate(manifest.get("steps", [])):
+        expect(step, dict, f"/steps/{index}", "an object")
+        for key in ("level", "message"):
+            if key in step:
+                expect(step[key], str, f"/steps/{index}/{key}", "a string")
+    trace = manifest.get("exception", {}).get("stackTrace")
+    if trace is not None:
+        expect(trace, str, "/exception/stackTrace", "a string")
+
+
+def parameters_key(manifest: Dict[str, Any]) -> str:
+    """Canonical form of `meta.parameters`; "" for tests without parameters."""
+    parameters = manifest.get("meta", {}).get("parameters")
+    if not parameters:
+        return ""
+    return json.dumps(parameters, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def scan_run(run_dir: Path) -> List[Tuple[str, str, Path]]:
+    """Return (testId, timestamp, path) for every bundle directory directly under `run_dir`."""
+    bundles = []
+    with os.scandir(run_dir) as entries:
+        for entry in entries:
+            match = BUNDLE_DIR_RE.match(entry.name)
+            if match and entry.is_dir():
+                test_id, ts = match.groups()
+                bundles.append((test_id, ts, Path(entry.path)))
+    return bundles
+
+
+def index_run(
+    run_dir: Path, workers: Optional[int] = None
+) -> Tuple[Dict[CaseKey, Tuple[Path, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """Load the bundles under `run_dir` and keep the latest one per test case.
+
+    A case is (testId, canonical meta.parameters): the testId leaves parameters
+    out, so every case of a parametrized test is kept separately. Returns
+    {case: (bundle dir, manifest)} and an "error" result for each bundle whose
+    manifest could not be loaded. Manifests are read in parallel.
+    """
+    bundles = scan_run(run_dir)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        loaded = list(pool.map(_try_load, [path for _, _, path in bundles]))
+    latest: Dict[CaseKey, Tuple[str, Path, Dict[str, Any]]] = {}
+    errors = []
+    for (test_id, ts, path), (manifest, error) in zip(bundles, loaded):
+        if manifest is None:
+            errors.append(_error(path, error, test_id))
+            continue
+        key = (test_id, parameters_key(manifest))
+        if key not in latest or ts > latest[key][0]:
+            latest[key] = (ts, path, manifest)
+    errors.sort(key=lambda e: (e["testId"], e["path"]))
+    return {key: (path, manifest) for key, (_, path, manifest) in latest.items()}, errors
+
+
+def _try_load(path: Path) -> Tuple[Optional[Dict[str, Any]], str]:
+    try:
+        return load_manifest(path), ""
+    except (OSError, ValueError) as exc:
+        return None, str(exc)
+
+
+def _error(path: Path, error: str, test_id: Optional[str] = None) -> Dict[str, Any]:
+    return {"testId": test_id, "status": "error", "path": str(manifest_path(path)), "error": error}
+
+
+# ---------------------------------------------------------------------------
+# Diffing
+# ---------------------------------------------------------------------------
+def diff_mapping(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    old = old or {}
+    new = new or {}
+    result: Dict[str, Any] = {}
+    added = {k: new[k] for k in new if k not in old}
+    removed = {k: old[k] for k in old if k not in new}
+    changed = {k: {"old": old[k], "new": new[k]} for k in old if k in new and old[k] != new[k]}
+    if added:
+        result["added"] = added
+    if removed:
+        result["removed"] = removed
+    if changed:
+        result["changed"] = changed
+    return result
+
+
+def _step_key(step: Dict[str, Any]) -> Tuple[str, str]:
+    return (step.get("level", ""), step.get("message", ""))
+
+
+def diff_steps(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Align steps on (level, message), ignoring timestamps, and report the edits."""
+    ops: List[Dict[str, Any]] = []
+    matcher = difflib.SequenceMatcher(
+        a=[_step_key(s) for s in old], b=[_step_key(s) for s in new], autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                if old[i].get("data") != new[j].get("data"):
+                    ops.append(
+                        {
+                            "op": "data",
+                            "old": i,
+                            "new": j,
+                            "step": _strip_ts(new[j]),
+                            "oldData": old[i].get("data"),
+                            "newData": new[j].get("data"),
+                        }
+                    )
+            continue
+        op = {"op": tag, "old": i1, "new": j1}
+        if i2 > i1:
+            op["removed"] = [_strip_ts(s) for s in old[i1:i2]]
+        if j2 > j1:
+            op["added"] = [_strip_ts(s) for s in new[j1:j2]]
+        ops.append(op)
+    return ops
+
+
+def _strip_ts(step: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in step.items() if k != "ts"}
+
+
+def diff_text(old: Optional[str], new: Optional[str]) -> List[str]:
+    if old == new:
+        return []
+    return list(
+        difflib.unified_diff(
+            (old or "").splitlines(),
+            (new or "").splitlines(),
+            fromfile="old",
+            tofile="new",
+            lineterm="",
+        )
+    )
+
+
+def diff_manifests(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Return only the sections that differ; an empty dict means no changes."""
+    old_meta, new_meta = old.get("meta", {}), new.get("meta", {})
+    result: Dict[str, Any] = {}
+
+    sections = {
+        "parameters": diff_mapping(old_meta.get("parameters"), new_meta.get("parameters")),
+        "runtime": _diff_meta_keys(old_meta, new_meta, RUNTIME_KEYS),
+        "context": diff_mapping(old.get("context"), new.get("context")),
+        "steps": diff_steps(old.get("steps", []), new.get("steps", [])),
+    }
+    for name, section in sections.items():
+        if section:
+            result[name] = section
+
+    old_exc, new_exc = old.get("exception", {}), new.get("exception", {})
+    exception: Dict[str, Any] = {}
+    for key in ("type", "message"):
+        if old_exc.get(key) != new_exc.get(key):
+            exception[key] = {"old": old_exc.get(key), "new": new_exc.get(key)}
+    trace = diff_text(old_exc.get("stackTrace"), new_exc.get("stackTrace"))
+    if trace:
+        exception["stackTrace"] = trace
+    if exception:
+        result["exception"] = exception
+    return result
+
+
+def diff_run_identity(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Diff the run-identity metadata (commit, CI build, environment) of two manifests."""
+    return _diff_meta_keys(old.get("meta", {}), new.get("meta", {}), RUN_IDENTITY_KEYS)
+
+
+def _diff_meta_keys(
+    old_meta: Dict[str, Any], new_meta: Dict[str, Any], keys: Tuple[str, ...]
+) -> Dict[str, Any]:
+    return diff_mapping(
+        {k: old_meta[k] for k in keys if k in old_meta},
+        {k: new_meta[k] for k in keys if k in new_meta},
+    )
+
+
+def diff_bundles(old_path: Path, new_path: Path) -> Dict[str, Any]:
+    """Diff two bundles; an unreadable manifest yields an "error" result naming it."""
+    manifests = []
+    for path in (old_path, new_path):
+        manifest, error = _try_load(path)
+        if manifest is None:
+            return _error(path, error)
+        manifests.append(manifest)
+    return _result(old_path, new_path, *manifests)
+
+
+def _result(old_path: Path, new_path: Path, old: Dict[str, Any], new: Dict[str, Any]):
+    changes = diff_manifests(old, new)
+    return {
+        "testId": new.get("meta", {}).get("testId"),
+        **_parameters(new),
+        "status": "changed" if changes else "unchanged",
+        "old": str(old_path),
+        "new": str(new_path),
+        "changes": changes,
+        "runIdentity": diff_run_identity(old, new),
+    }
+
+
+def _parameters(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    parameters = manifest.get("meta", {}).get("parameters")
+    return {"parameters": parameters} if parameters else {}
+
+
+def diff_runs(baseline: Path, candidate: Path, workers: Optional[int] = None) -> List[Dict]:
+    """Diff every test case of `candidate` against the same case in `baseline`.
+
+    Cases are matched on testId and parameters. Cases only failing in the
+    candidate are reported as "new", cases only failing in the baseline as
+    "resolved", and bundles with an unreadable manifest as "error" without
+    stopping the others. Unmatched cases of a testId that has an "error" are not
+    reported as new or resolved, since the unreadable bundle may be their pair.
+    """
+    base_index, base_errors = index_run(baseline, workers)
+    cand_index, cand_errors = index_run(candidate, workers)
+    errored = {e["testId"] for e in base_errors + cand_errors}
+    results = []
+    for key in sorted(base_index.keys() & cand_index.keys()):
+        (old_path, old), (new_path, new) = base_index[key], cand_index[key]
+        results.append(_result(old_path, new_path, old, new))
+    for key in sorted(cand_index.keys() - base_index.keys()):
+        if key[0] not in errored:
+            path, manifest = cand_index[key]
+            results.append(
+                {"testId": key[0], **_parameters(manifest), "status": "new", "new": str(path)}
+            )
+    for key in sorted(base_index.keys() - cand_index.keys()):
+        if key[0] not in errored:
+            path, manifest = base_index[key]
+            results.append(
+                {"testId": key[0], **_parameters(manifest), "status": "resolved", "old": str(path)}
+            )
+    return results + base_errors + cand_errors
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+def _short(value: Any) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= 120 else text[:117] + "..."
+
+
+def _step_line(step: Dict[str, Any]) -> str:
+    return f"[{step.get('level')}] {step.get('message')}"
+
+
+def render_mapping(diff: Dict[str, Any]) -> Iterable[str]:
+    for key, value in diff.get("added", {}).items():
+        yield f"  + {key}: {_short(value)}"
+    for key, value in diff.get("removed", {}).items():
+        yield f"  - {key}: {_short(value)}"
+    for key, change in diff.get("changed", {}).items():
+        yield f"  ~ {key}: {_short(change['old'])} -> {_short(change['new'])}"
+
+
+def _case(result: Dict[str, Any]) -> str:
+    parameters = result.get("parameters")
+    return f"{result['testId']} {_short(parameters)}" if parameters else str(result["testId"])
+
+
+def render(result: Dict[str, Any]) -> Iterable[str]:
+    status = result["status"]
+    if status == "new":
+        yield f"NEW: {_case(result)} ({result['new']})"
+        return
+    if status == "resolved":
+        yield f"RESOLVED: {_case(result)} ({result['old']})"
+        return
+    if status == "error":
+        yield f"ERROR: {result['testId'] or '-'} ({result['path']}): {result['error']}"
+        return
+    yield f"{status.upper()}: {_case(result)} ({result['old']} -> {result['new']})"
+    if result.get("runIdentity"):
+        yield " run identity:"
+        yield from render_mapping(result["runIdentity"])
+    changes = result["changes"]
+    for name in ("parameters", "runtime", "context"):
+        if name in changes:
+            yield f" {name}:"
+            yield from render_mapping(changes[name])
+    if "steps" in changes:
+        yield " steps:"
+        for op in changes["steps"]:
+            if op["op"] == "data":
+                yield (
+                    f"  ~ #{op['new']} {_step_line(op['step'])} data: "
+                    f"{_short(op['oldData'])} -> {_short(op['newData'])}"
+                )
+                continue
+            for step in op.get("removed", []):
+                yield f"  - #{op['old']} {_step_line(step)}"
+            for step in op.get("added", []):
+                yield f"  + #{op['new']} {_step_line(step)}"
+    if "exception" in changes:
+        exception = changes["exception"]
+        yield " exception:"
+        for key in ("type", "message"):
+            if key in exception:
+                yield f"  ~ {key}: {_short(exception[key]['old'])} -> {_short(exception[key]['new'])}"
+        for line in exception.get("stackTrace", []):
+            yield f"    {line}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare BlackBox bundles for the same test across runs."
+    )
+    parser.add_argument("paths", nargs="+", help="OLD NEW bundles, or the candidate run dir")
+    parser.add_argument("--baseline", help="baseline run directory (batch mode)")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of text")
+    parser.add_argument("--workers", type=int, default=None, help="parallel manifest readers")
+    parser.add_argument(
+        "--changed-only", action="store_true", help="omit unchanged tests in batch mode"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        if args.baseline:
+            if len(args.paths) != 1:
+                parser.error("batch mode takes exactly one candidate run directory")
+            results = diff_runs(Path(args.baseline), Path(args.paths[0]), args.workers)
+        else:
+            if len(args.paths) != 2:
+                parser.error("expected OLD and NEW bundle paths")
+            results = [diff_bundles(Path(args.paths[0]), Path(args.paths[1]))]
+    except (OSError, ValueError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+
+    if args.changed_only:
+        results = [r for r in results if r["status"] != "unchanged"]
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for result in results:
+            for line in render(result):
+                print(line)
+    statuses = {r["status"] for r in results}
+    if "error" in statuses:
+        return 2
+    return 1 if statuses - {"unchanged"} else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
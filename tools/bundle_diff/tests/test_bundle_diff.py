@@ -0,0 +1,265 @@
+"""Tests for bundle_diff.py — cross-run bundle comparison."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to sys.path so we can import bundle_diff
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bundle_diff import (  # noqa: E402
+    diff_bundles,
+    diff_manifests,
+    diff_run_identity,
+    diff_runs,
+    diff_steps,
+    index_run,
+    main,
+)
+
+GOLDEN_BUNDLE = (
+    Path(__file__).resolve().parents[3]
+    / "spec"
+    / "compliance"
+    / "golden"
+    / "9f2a0c1b3d4e5a6b_20260202T143000Z"
+)
+
+
+def _step(message, level="INFO", ts="2026-01-01T00:00:00Z", **extra):
+    return {"ts": ts, "level": level, "message": message, **extra}
+
+
+def _manifest(test_id="9f2a0c1b3d4e5a6b", **overrides):
+    manifest = {
+        "schemaVersion": 1,
+        "meta": {
+            "testId": test_id,
+            "testName": "test",
+            "testClass": "test.py",
+            "status": "FAILED",
+            "timestamp": "2026-01-01T00:00:00Z",
+            "durationMs": 0,
+            "runId": "00000000-0000-0000-0000-000000000000",
+            "framework": {"name": "pytest", "version": "8.0.0"},
+            "runtime": {"language": "python", "version": "3.11.0", "os": "Linux"},
+        },
+        "context": {"user": "alice"},
+        "steps": [_step("start")],
+        "exception": {"type": "AssertionError", "message": "fail", "stackTrace": "a\nb"},
+        "artifacts": {"bundleDir": "x", "logs": "context.log"},
+    }
+    manifest.update(overrides)
+    return manifest
+
+
+def _write_bundle(run_dir, manifest, ts="20260101T000000Z"):
+    bundle = run_dir / f"{manifest['meta']['testId']}_{ts}"
+    bundle.mkdir(parents=True)
+    (bundle / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    return bundle
+
+
+# ---------------------------------------------------------------------------
+# diff_manifests
+# ---------------------------------------------------------------------------
+class TestDiffManifests:
+    def test_identical_is_empty(self):
+        assert diff_manifests(_manifest(), _manifest()) == {}
+
+    def test_context_changes(self):
+        new = _manifest(context={"user": "bob", "cart": [1]})
+        changes = diff_manifests(_manifest(), new)
+        assert changes["context"] == {
+            "added": {"cart": [1]},
+            "changed": {"user": {"old": "alice", "new": "bob"}},
+        }
+
+    def test_runtime_changes(self):
+        new = _manifest()
+        new["meta"]["runtime"] = {"language": "python", "version": "3.12.0", "os": "Linux"}
+        changes = diff_manifests(_manifest(), new)
+        assert set(changes["runtime"]) == {"changed"}
+        assert changes["runtime"]["changed"]["runtime"]["new"]["version"] == "3.12.0"
+
+    def test_run_identity_is_reported_separately(self):
+        old, new = _manifest(), _manifest()
+        old["meta"].update(gitSha="abc123", ci={"provider": "github-actions", "buildId": "1"})
+        new["meta"].update(gitSha="def456", ci={"provider": "github-actions", "buildId": "2"})
+        new["meta"]["env"] = {"CI": "true"}
+        assert diff_manifests(old, new) == {}
+        identity = diff_run_identity(old, new)
+        assert identity["changed"]["gitSha"] == {"old": "abc123", "new": "def456"}
+        assert set(identity["changed"]) == {"gitSha", "ci"}
+        assert identity["added"] == {"env": {"CI": "true"}}
+
+    def test_timestamps_do_not_count(self):
+        new = _manifest(steps=[_step("start", ts="2026-06-01T00:00:00Z")])
+        new["meta"]["timestamp"] = "2026-06-01T00:00:00Z"
+        assert diff_manifests(_manifest(), new) == {}
+
+    def test_exception_message_and_trace(self):
+        new = _manifest(exception={"type": "AssertionError", "message": "x", "stackTrace": "a\nc"})
+        exception = diff_manifests(_manifest(), new)["exception"]
+        assert exception["message"] == {"old": "fail", "new": "x"}
+        assert "-b" in exception["stackTrace"]
+        assert "+c" in exception["stackTrace"]
+
+
+# ---------------------------------------------------------------------------
+# diff_steps
+# ---------------------------------------------------------------------------
+class TestDiffSteps:
+    def test_insertion_is_aligned(self):
+        old = [_step("a"), _step("c")]
+        new = [_step("a"), _step("b", level="WARN"), _step("c")]
+        ops = diff_steps(old, new)
+        assert ops == [
+            {"op": "insert", "old": 1, "new": 1, "added": [{"level": "WARN", "message": "b"}]}
+        ]
+
+    def test_level_change_is_replace(self):
+        ops = diff_steps([_step("a")], [_step("a", level="ERROR")])
+        assert ops[0]["op"] == "replace"
+
+    def test_data_change_on_aligned_step(self):
+        ops = diff_steps([_step("a", data=1)], [_step("a", data=2)])
+        assert ops[0]["op"] == "data"
+        assert (ops[0]["oldData"], ops[0]["newData"]) == (1, 2)
+
+
+# ---------------------------------------------------------------------------
+# Run-level diffing
+# ---------------------------------------------------------------------------
+class TestDiffRuns:
+    def test_index_run_keeps_latest_bundle(self, tmp_path):
+        _write_bundle(tmp_path, _manifest(), ts="20260101T000000Z")
+        latest = _write_bundle(tmp_path, _manifest(context={}), ts="20260102T000000Z")
+        (tmp_path / "not-a-bundle").mkdir()
+        index, errors = index_run(tmp_path)
+        assert errors == []
+        assert list(index) == [("9f2a0c1b3d4e5a6b", "")]
+        path, manifest = index[("9f2a0c1b3d4e5a6b", "")]
+        assert path == latest
+        assert manifest["context"] == {}
+
+    def test_parametrized_cases_are_kept_apart(self, tmp_path, capsys):
+        base, cand = tmp_path / "base", tmp_path / "cand"
+
+        def case(x, **overrides):
+            manifest = _manifest(**overrides)
+            manifest["meta"]["parameters"] = {"x": x}
+            return manifest
+
+        _write_bundle(base, case(1), ts="20260101T000000Z")
+        _write_bundle(base, case(2), ts="20260101T000001Z")
+        _write_bundle(cand, case(2, context={"user": "bob"}), ts="20260102T000000Z")
+        _write_bundle(cand, case(3), ts="20260102T000001Z")
+        index, _ = index_run(base)
+        assert sorted(index) == [("9f2a0c1b3d4e5a6b", '{"x":1}'), ("9f2a0c1b3d4e5a6b", '{"x":2}')]
+        results = {(r["status"], r["parameters"]["x"]) for r in diff_runs(base, cand)}
+        assert results == {("changed", 2), ("new", 3), ("resolved", 1)}
+        assert main(["--baseline", str(base), str(cand)]) == 1
+        out = capsys.readouterr().out
+        assert 'CHANGED: 9f2a0c1b3d4e5a6b {"x": 2}' in out
+        assert 'RESOLVED: 9f2a0c1b3d4e5a6b {"x": 1}' in out
+
+    def test_statuses(self, tmp_path):
+        base, cand = tmp_path / "base", tmp_path / "cand"
+        _write_bundle(base, _manifest("aaaaaaaaaaaaaaaa"))
+        _write_bundle(cand, _manifest("aaaaaaaaaaaaaaaa", context={"user": "bob"}))
+        _write_bundle(base, _manifest("bbbbbbbbbbbbbbbb"))
+        _write_bundle(cand, _manifest("bbbbbbbbbbbbbbbb"))
+        _write_bundle(base, _manifest("cccccccccccccccc"))
+        _write_bundle(cand, _manifest("dddddddddddddddd"))
+        statuses = {r["testId"]: r["status"] for r in diff_runs(base, cand, workers=2)}
+        assert statuses == {
+            "aaaaaaaaaaaaaaaa": "changed",
+            "bbbbbbbbbbbbbbbb": "unchanged",
+            "cccccccccccccccc": "resolved",
+            "dddddddddddddddd": "new",
+        }
+
+    def test_corrupt_manifest_does_not_stop_the_batch(self, tmp_path):
+        base, cand = tmp_path / "base", tmp_path / "cand"
+        _write_bundle(base, _manifest("aaaaaaaaaaaaaaaa"))
+        broken = _write_bundle(cand, _manifest("aaaaaaaaaaaaaaaa"))
+        (broken / "manifest.json").write_text("{not json", encoding="utf-8")
+        _write_bundle(base, _manifest("bbbbbbbbbbbbbbbb"))
+        _write_bundle(cand, _manifest("bbbbbbbbbbbbbbbb", context={}))
+        results = {r["testId"]: r for r in diff_runs(base, cand)}
+        assert results["aaaaaaaaaaaaaaaa"]["status"] == "error"
+        assert results["aaaaaaaaaaaaaaaa"]["path"] == str(broken / "manifest.json")
+        assert results["aaaaaaaaaaaaaaaa"]["error"]
+        assert results["bbbbbbbbbbbbbbbb"]["status"] == "changed"
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+class TestMain:
+    def test_golden_against_itself(self, capsys):
+        assert main([str(GOLDEN_BUNDLE), str(GOLDEN_BUNDLE / "manifest.json")]) == 0
+        assert "UNCHANGED" in capsys.readouterr().out
+
+    def test_changed_bundle_json_output(self, tmp_path, capsys):
+        old = _write_bundle(tmp_path / "a", _manifest())
+        new = _write_bundle(tmp_path / "b", _manifest(context={}))
+        assert main(["--json", str(old), str(new)]) == 1
+        (result,) = json.loads(capsys.readouterr().out)
+        assert result["changes"]["context"] == {"removed": {"user": "alice"}}
+
+    def test_run_identity_does_not_mark_changed(self, tmp_path, capsys):
+        old_manifest, new_manifest = _manifest(), _manifest()
+        old_manifest["meta"]["gitSha"] = "abc123"
+        new_manifest["meta"]["gitSha"] = "def456"
+        old = _write_bundle(tmp_path / "a", old_manifest)
+        new = _write_bundle(tmp_path / "b", new_manifest)
+        assert main([str(old), str(new)]) == 0
+        out = capsys.readouterr().out
+        assert out.startswith("UNCHANGED:")
+        assert ' ~ gitSha: "abc123" -> "def456"' in out
+
+    def test_missing_bundle(self, tmp_path):
+        assert main([str(tmp_path / "nope"), str(tmp_path / "nope")]) == 2
+
+    def test_non_object_manifest(self, tmp_path):
+        old = _write_bundle(tmp_path / "a", _manifest())
+        new = _write_bundle(tmp_path / "b", _manifest())
+        (new / "manifest.json").write_text("[]", encoding="utf-8")
+        result = diff_bundles(old, new)
+        assert result["status"] == "error"
+        assert result["path"] == str(new / "manifest.json")
+
+    @pytest.mark.parametrize(
+        "overrides, pointer",
+        [
+            ({"steps": ["x"]}, "/steps/0"),
+            ({"steps": {}}, "/steps"),
+            ({"steps": [{"level": ["INFO"], "message": "m"}]}, "/steps/0/level"),
+            ({"context": []}, "/context"),
+            ({"meta": "m"}, "/meta"),
+            ({"exception": {"type": "E", "stackTrace": 1}}, "/exception/stackTrace"),
+        ],
+    )
+    def test_schema_invalid_manifest(self, tmp_path, overrides, pointer):
+        old = _write_bundle(tmp_path / "a", _manifest())
+        new = _write_bundle(tmp_path / "b", _manifest())
+        (new / "manifest.json").write_text(json.dumps({**_manifest(), **overrides}))
+        result = diff_bundles(old, new)
+        assert result["status"] == "error"
+        assert result["path"] == str(new / "manifest.json")
+        assert result["error"].startswith(pointer + " is not")
+
+    def test_batch_reports_errors_and_keeps_going(self, tmp_path, capsys):
+        base, cand = tmp_path / "base", tmp_path / "cand"
+        _write_bundle(base, _manifest("aaaaaaaaaaaaaaaa"))
+        broken = _write_bundle(cand, _manifest("aaaaaaaaaaaaaaaa"))
+        (broken / "manifest.json").write_text("", encoding="utf-8")
+        _write_bundle(base, _manifest("bbbbbbbbbbbbbbbb"))
+        _write_bundle(cand, _manifest("bbbbbbbbbbbbbbbb", context={}))
+        assert main(["--baseline", str(base), str(cand)]) == 2
+        out = capsys.readouterr().out
+        assert f"ERROR: aaaaaaaaaaaaaaaa ({broken / 'manifest.json'})" in out
+        assert "CHANGED: bbbbbbbbbbbbbbbb" in out
@@ -170,6 +170,12 @@ run_unit_tests() {
     fail=1
   fi
 
+  echo "[compliance] running bundle diff unit tests..."
+  if ! (cd "$ROOT_DIR/tools/bundle_diff" && "$PYTHON_BIN" -m pytest tests/ -v); then
+    echo "ERROR: Bundle diff unit tests failed!"
+    fail=1
+  fi
+
   echo "[compliance] running Python adapter unit tests..."
   (cd "$ROOT_DIR/adapters/python-pytest" && "$PYTHON_BIN" -m pip install -e . >/dev/null)
   if ! (cd "$ROOT_DIR/adapters/python-pytest" && "$PYTHON_BIN" -m pytest tests/test_plugin_units.py -v); then
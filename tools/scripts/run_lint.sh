@@ -29,12 +29,16 @@ check_tools
 echo "[lint] Python (ruff)"
 "$PYTHON_BIN" -m ruff check \
   "$ROOT_DIR/spec/compliance" \
+  "$ROOT_DIR/tools/bench" \
+  "$ROOT_DIR/tools/bundle_diff" \
   "$ROOT_DIR/adapters/python-pytest/src" \
   "$ROOT_DIR/adapters/python-pytest/tests"
 
 echo "[lint] Python (black --check)"
 "$PYTHON_BIN" -m black --check \
   "$ROOT_DIR/spec/compliance" \
+  "$ROOT_DIR/tools/bench" \
+  "$ROOT_DIR/tools/bundle_diff" \
   "$ROOT_DIR/adapters/python-pytest/src" \
   "$ROOT_DIR/adapters/python-pytest/tests"
 